@@ -19,23 +19,10 @@ def _logger() -> JsonActionLogger:
     return JsonActionLogger(root / "logs" / "errors" / "events.jsonl")
 
 
-def _load_cfg() -> dict:
-    root = Path(__file__).resolve().parent.parent
-    cfg_path = root / "config" / "ocr.json"
-    cfg = {}
-    if cfg_path.exists():
-        try:
-            cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
-        except Exception:
-            cfg = {}
-    return cfg
-
-
 def _make_ocr(log_fn) -> Any:
-    from src.ocr import CopilotOCR  # type: ignore
+    from src.ocr_factory import make_ocr  # type: ignore
     root = Path(__file__).resolve().parent.parent
-    debug_dir = root / "logs" / "ocr"
-    return CopilotOCR(_load_cfg(), log=log_fn, debug_dir=debug_dir)
+    return make_ocr(str(root), str(root / "logs" / "ocr"), log_fn)
 
 
 def _maybe_run_cleanup(root: Path) -> None:
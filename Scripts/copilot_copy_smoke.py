@@ -10,21 +10,7 @@ from pathlib import Path
 from src.control import Controller, SafetyLimits
 from src.windows import WindowsManager
 from src.vsbridge import VSBridge
-
-
-def _make_ocr(log_fn):
-    from src.ocr import CopilotOCR  # type: ignore
-
-    root = Path(__file__).resolve().parent.parent
-    cfg_path = root / "config" / "ocr.json"
-    cfg = {}
-    if cfg_path.exists():
-        try:
-            cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
-        except Exception:
-            cfg = {}
-    debug_dir = root / "logs" / "ocr"
-    return CopilotOCR(cfg, log=log_fn, debug_dir=debug_dir)
+from src.ocr_factory import make_ocr
 
 
 def _maybe_run_cleanup(root: Path) -> None:
@@ -108,7 +94,7 @@ def main() -> int:
         print(msg)
 
     vb = VSBridge(ctrl=ctrl, logger=_log, winman=winman, delay_ms=300, dry_run=False)
-    ocr = _make_ocr(_log)
+    ocr = make_ocr(str(root), str(root / "logs" / "ocr"), _log)
 
     # Read what's currently visible in Copilot app and pick a target substring.
     cap = vb.read_copilot_app_text(ocr, save_dir=root / "logs" / "ocr", return_meta=True) or {}
@@ -6,7 +6,7 @@ from pathlib import Path
 from src.control import Controller, SafetyLimits
 from src.vsbridge import VSBridge
 from src.windows import WindowsManager
-from src.ocr import CopilotOCR
+from src.ocr_factory import make_ocr
 
 
 def write_report(root: Path, report: dict) -> Path:
@@ -21,7 +21,6 @@ def write_report(root: Path, report: dict) -> Path:
 def main() -> int:
     root = Path(__file__).resolve().parent.parent
     rules_path = root / "config" / "policy_rules.json"
-    ocr_cfg_path = root / "config" / "ocr.json"
     try:
         rules = json.loads(rules_path.read_text(encoding="utf-8"))
     except Exception:
@@ -50,12 +49,9 @@ def main() -> int:
     log = lambda m: None
     vs = VSBridge(ctrl, log, winman=win, delay_ms=int(vs_cfg.get("delay_ms", 300)), dry_run=bool(vs_cfg.get("dry_run", False)))
 
-    try:
-        ocr_cfg = json.loads(ocr_cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        ocr_cfg = {"enabled": True}
     ocr_debug = root / "logs" / "ocr"
-    ocr = CopilotOCR(ocr_cfg, log=lambda m: None, debug_dir=ocr_debug)
+    ocr = make_ocr(str(root), str(ocr_debug), lambda m: None)
+    ocr_cfg = ocr.cfg
 
     vs.focus_vscode_window()
     time.sleep(0.35)
@@ -1,8 +1,95 @@
 import argparse
-import json
+import os
+import re
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - optional for this script
+    np = None
+
+try:
+    import orjson as _json  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    import json as _json
+
+
+# Evidence tokens looked up in OCR previews. The lookahead lets every
+# occurrence register, even overlapping ones, from a single scan.
+_TOKEN_RE = re.compile(r"(?=(upload|more options|\+|file ?name|open|cancel))")
+
+# Flag bits for the per-image verdict tables. F_* are evidence tokens found in
+# OCR previews, T_* are substrings of the event tag, E_* of the event name.
+F_UPLOAD = 1 << 0
+F_MORE_OPTIONS = 1 << 1
+F_PLUS = 1 << 2
+F_FILENAME = 1 << 3
+F_OPEN = 1 << 4
+F_CANCEL = 1 << 5
+T_UPLOAD = 1 << 6
+T_MORE_OPTIONS = 1 << 7
+T_MO_UPLOAD = 1 << 8
+T_INPUT_PLUS_MO = 1 << 9
+T_MO_EXACT = 1 << 10
+T_MOUSE_HOTSPOT = 1 << 11
+E_DIALOG = 1 << 12
+E_HOTSPOT = 1 << 13
+F_NO_EVIDENCE = 1 << 14
+
+_TOKEN_BITS = {
+    "upload": F_UPLOAD,
+    "more options": F_MORE_OPTIONS,
+    "+": F_PLUS,
+    "file name": F_FILENAME,
+    "filename": F_FILENAME,
+    "open": F_OPEN,
+    "cancel": F_CANCEL,
+}
+_TAG_RE = re.compile(r"(?=(input_plus_more_options|more_options_upload|more_options|upload|mouse_hotspot))")
+_TAG_BITS = {
+    "input_plus_more_options": T_INPUT_PLUS_MO,
+    "more_options_upload": T_MO_UPLOAD,
+    "more_options": T_MORE_OPTIONS,
+    "upload": T_UPLOAD,
+    "mouse_hotspot": T_MOUSE_HOTSPOT,
+}
+
+# Payload fields echoed verbatim in each image's notes when set.
+_EXTRA_KEYS = ("probe_name", "probe_control_type", "reason", "target", "step", "tag")
+
+# Copy/pastable (PowerShell and cmd) command that regenerates the report.
+_RERUN_TEMPLATE = (
+    "C:/Users/yerbr/AI_Coder_Controller/Scripts/python.exe Scripts/generate_ocr_observations_md.py "
+    "--events {events} --out {out} --file-substr {substr}"
+)
+
+# Markdown skeleton of one image section, filled with a single str.format
+# call per image. ``notes`` is either empty or newline-prefixed lines.
+_IMAGE_SECTION = """\
+## {idx}. {event} — {context} — {ts}
+
+**Image:** [{rel}]({rel})
+
+### (1) Needed objects present?
+{present}
+
+### (2) Cursor hovering correct object?
+- {cursor}
+
+### (3) Intended next action
+- {next_action}
+
+### (4) Previous action that led here
+- {prev_action}
+
+### (5) Was this the location expected?
+- {location}
+
+### (6) Notes / anything else{notes}
+"""
 
 
 @dataclass(frozen=True)
@@ -16,85 +103,136 @@ class ImageRef:
 
 
 def _load_jsonl(path: Path) -> List[Dict[str, Any]]:
+    # Stream the log line by line from a large binary buffer instead of
+    # materializing the whole file as one string plus a list of lines.
     out: List[Dict[str, Any]] = []
-    for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            obj = json.loads(line)
-        except Exception:
-            continue
-        if isinstance(obj, dict):
-            out.append(obj)
+    with path.open("rb", buffering=1 << 20) as f:
+        for raw in f:
+            # Skip bare newlines; the JSON decoder tolerates surrounding
+            # whitespace, and blank-ish lines simply fail to parse below.
+            if len(raw) <= 1:
+                continue
+            try:
+                obj = _json.loads(raw)
+            except Exception:
+                continue
+            if isinstance(obj, dict):
+                out.append(obj)
     return out
 
 
+_SLASH_TABLE = str.maketrans({"\\": "/"})
+
+
+@lru_cache(maxsize=8)
+def _root_prefix(workspace_root: str) -> str:
+    return os.path.normcase(os.path.normpath(workspace_root)).rstrip("\\/") + os.sep
+
+
 def _relpath(workspace_root: Path, p: str) -> str:
+    # Paths under the workspace become workspace-relative (case-insensitively
+    # on Windows via normcase); anything else is kept as-is. Always forward slashes.
     try:
-        ap = Path(p)
-        rp = ap
-        try:
-            rp = ap.relative_to(workspace_root)
-        except Exception:
-            # best-effort normalize by string replacement
-            ws = str(workspace_root).rstrip("\\/")
-            s = str(ap)
-            if s.lower().startswith(ws.lower()):
-                rp = Path(s[len(ws) :].lstrip("\\/"))
-        return rp.as_posix()
-    except Exception:
-        return str(p).replace("\\", "/")
-
-
-def _pick_target_run(events: List[Dict[str, Any]], file_substr: Optional[str]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        rp = os.path.normpath(p)
+    except (TypeError, ValueError):
+        return str(p).translate(_SLASH_TABLE)
+    prefix = _root_prefix(str(workspace_root))
+    if os.path.normcase(rp).startswith(prefix):
+        rp = rp[len(prefix) :]
+    return rp.translate(_SLASH_TABLE)
+
+
+class _EventView(NamedTuple):
+    """String fields of every event, coerced once and indexed in parallel."""
+
+    ts: List[str]
+    ev: List[str]
+    file: List[str]
+    act: List[str]  # tag/step/name: labels an action event
+    nav: List[str]  # step/tag: keys navigation repeats
+
+    def take(self, idxs: List[int]) -> "_EventView":
+        return _EventView(*([col[i] for i in idxs] for col in self))
+
+
+def _event_view(events: List[Dict[str, Any]]) -> _EventView:
+    view = _EventView([], [], [], [], [])
+    ts, ev, file, act, nav = view
+    for e in events:
+        g = e.get
+        ts.append(str(g("ts") or ""))
+        ev.append(str(g("event") or ""))
+        file.append(str(g("file") or ""))
+        act.append(str(g("tag") or g("step") or g("name") or ""))
+        nav.append(str(g("step") or g("tag") or ""))
+    return view
+
+
+def _pick_target_run(view: _EventView, file_substr: Optional[str]) -> Tuple[Optional[str], List[int]]:
+    """Return the target file and the event indices of the run window."""
+    evs = view.ev
+
+    def _window(start_idx: int, last_idx: int) -> List[int]:
+        return [i for i in range(start_idx, last_idx + 1) if evs[i].startswith("copilot_")]
+
     if file_substr:
-        matching = [e for e in events if file_substr in str(e.get("file") or "")]
-        if matching:
-            # Use the most recent contiguous window where file matches.
-            target_file = str(matching[-1].get("file") or "")
-            # Find last failure for that file.
-            last_idx = None
-            for i in range(len(events) - 1, -1, -1):
-                if str(events[i].get("file") or "") == target_file and str(events[i].get("event") or "") == "copilot_app_attachment_failed":
-                    last_idx = i
-                    break
-            if last_idx is None:
-                last_idx = len(events) - 1
-
-            # Find start marker (attempted) for that file.
-            start_idx = 0
-            for i in range(last_idx, -1, -1):
-                if str(events[i].get("event") or "") == "copilot_app_attachment_attempted" and str(events[i].get("file") or "") == target_file:
-                    start_idx = i
+        files = view.file
+        # Single backwards pass: the most recent matching event fixes the target
+        # file; then record its last failure and the start marker (attempted)
+        # preceding that failure, or the last start marker if it never failed.
+        target_file = None
+        last_fail = None
+        last_attempt = None
+        attempt_before_fail = None
+        for i in range(len(evs) - 1, -1, -1):
+            f = files[i]
+            if target_file is None:
+                if file_substr not in f:
+                    continue
+                target_file = f
+            if f != target_file:
+                continue
+            ev = evs[i]
+            if ev == "copilot_app_attachment_failed":
+                if last_fail is None:
+                    last_fail = i
+            elif ev == "copilot_app_attachment_attempted":
+                if last_fail is not None:
+                    attempt_before_fail = i
                     break
-            window = [e for e in events[start_idx : last_idx + 1] if str(e.get("event") or "").startswith("copilot_")]
-            return target_file, window
+                if last_attempt is None:
+                    last_attempt = i
+        if target_file is not None:
+            if last_fail is None:
+                last_idx = len(evs) - 1
+                start_idx = last_attempt if last_attempt is not None else 0
+            else:
+                last_idx = last_fail
+                start_idx = attempt_before_fail if attempt_before_fail is not None else 0
+            return target_file, _window(start_idx, last_idx)
 
-    # Fallback: use the most recent copilot attach window (no file filter)
+    # Fallback: use the most recent copilot attach window (no file filter).
+    # Start markers are copilot_ events too, so one backwards pass finds both.
     last_idx = None
-    for i in range(len(events) - 1, -1, -1):
-        if str(events[i].get("event") or "").startswith("copilot_"):
+    start_idx = 0
+    for i in range(len(evs) - 1, -1, -1):
+        ev = evs[i]
+        if last_idx is None and ev.startswith("copilot_"):
             last_idx = i
+        if ev == "copilot_app_attachment_attempted":
+            start_idx = i
             break
     if last_idx is None:
         return None, []
+    return None, _window(start_idx, last_idx)
 
-    start_idx = 0
-    for i in range(last_idx, -1, -1):
-        if str(events[i].get("event") or "") == "copilot_app_attachment_attempted":
-            start_idx = i
-            break
-    window = [e for e in events[start_idx : last_idx + 1] if str(e.get("event") or "").startswith("copilot_")]
-    return None, window
 
-
-def _extract_images(window: List[Dict[str, Any]]) -> List[ImageRef]:
+def _extract_images(window: List[Dict[str, Any]], wv: _EventView) -> List[ImageRef]:
     refs: List[ImageRef] = []
-    for e in window:
-        ts = str(e.get("ts") or "")
-        ev = str(e.get("event") or "")
-        ctx = str(e.get("tag") or e.get("step") or e.get("name") or e.get("target") or "")
+    for j, e in enumerate(window):
+        ts = wv.ts[j]
+        ev = wv.ev[j]
+        ctx = wv.act[j] or str(e.get("target") or "")
 
         for key in ("point_image_path", "image_path"):
             v = e.get(key)
@@ -107,77 +245,213 @@ def _extract_images(window: List[Dict[str, Any]]) -> List[ImageRef]:
                 if isinstance(p, str) and p.lower().endswith(".png"):
                     refs.append(ImageRef(ts=ts, event=ev, key=f"image_paths[{i}]", img_abs=p, context=ctx, payload=e))
 
-    # dedup by absolute path, preserve order
-    seen = set()
-    uniq: List[ImageRef] = []
+    # dedup by absolute path, preserve order (first reference wins)
+    uniq: Dict[str, ImageRef] = {}
     for r in refs:
-        if r.img_abs in seen:
-            continue
-        seen.add(r.img_abs)
-        uniq.append(r)
-    return uniq
+        uniq.setdefault(r.img_abs, r)
+    return list(uniq.values())
+
+
+class _PayloadView(NamedTuple):
+    """Lowercased evidence of one image payload and its token bitmaps."""
+
+    tag_l: str
+    pp_l: str
+    all_l: str
+    tag_bits: int
+    pp_bits: int
+    prev_bits: int  # tokens in the first non-empty preview
+    all_bits: int
+
+
+class _Verdict(NamedTuple):
+    needed: Tuple[str, ...]
+    present: List[Tuple[str, bool, str]]
+    cursor: str
+    next_action: str
+    location: str
+
+
+def _scan_evidence(lowered: List[str]) -> Tuple[str, List[int]]:
+    """Scan the lowercase evidence parts in a single pass.
+
+    Returns the newline-joined text and, for each part, the bitmap of
+    ``_TOKEN_RE`` tokens found in it.
+    """
+    text = "\n".join(lowered)
+    ends: List[int] = []
+    pos = 0
+    for p in lowered:
+        pos += len(p)
+        ends.append(pos)
+        pos += 1
+    bits = [0] * len(lowered)
+    seg = 0
+    for m in _TOKEN_RE.finditer(text):
+        while m.start() >= ends[seg]:
+            seg += 1
+        bits[seg] |= _TOKEN_BITS[m.group(1)]
+    return text, bits
+
+
+def _payload_view(tag: str, pp: str, pv: str, op: str, labels: Optional[List[Any]]) -> _PayloadView:
+    tag_l = tag.lower()
+    pp_l, pv_l, op_l = pp.lower(), pv.lower(), op.lower()
+    labels_l = "\n".join(labels).lower() if labels is not None else ""
+    all_l, (pp_bits, pv_bits, op_bits, label_bits) = _scan_evidence([pp_l, pv_l, op_l, labels_l])
+    tag_bits = 0
+    for m in _TAG_RE.finditer(tag_l):
+        tag_bits |= _TAG_BITS[m.group(1)]
+    if tag_l == "more_options":
+        tag_bits |= T_MO_EXACT
+    return _PayloadView(
+        tag_l=tag_l,
+        pp_l=pp_l,
+        all_l=all_l,
+        tag_bits=tag_bits,
+        pp_bits=pp_bits,
+        prev_bits=pp_bits if pp_l else pv_bits if pv_l else op_bits,
+        all_bits=pp_bits | pv_bits | op_bits | label_bits,
+    )
 
 
-def _guess_needed_objects(ev: str, payload: Dict[str, Any]) -> List[str]:
-    tag = str(payload.get("tag") or payload.get("step") or "").lower()
-    prev = (str(payload.get("point_preview") or payload.get("preview") or payload.get("ocr_preview") or "").lower())
+# The rules below map a bitmap of tag/event/preview flags to a verdict. They
+# are evaluated once per flag combination at import time (see _table) so a
+# verdict per image is a single dict lookup.
 
-    if "input_plus_more_options" in tag or "more_options" in tag and "upload" not in tag:
-        return ["More options (+) button", "More options flyout/menu"]
-    if "more_options_upload" in tag or ("upload" in prev):
-        return ["Upload menu item", "File picker (Open dialog)"]
-    if "dialog" in ev or "file_picker" in ev:
-        return ["File name input field", "Open button", "Folder/address bar"]
-    if "hotspot" in ev:
-        return ["Attach/+ area", "File picker elements (Open/Cancel)"]
-    return ["Relevant UI control for next step"]
+
+def _guess_needed_objects(m: int) -> Tuple[str, ...]:
+    if m & T_INPUT_PLUS_MO or m & T_MORE_OPTIONS and not m & T_UPLOAD:
+        return ("More options (+) button", "More options flyout/menu")
+    if m & T_MO_UPLOAD or m & F_UPLOAD:
+        return ("Upload menu item", "File picker (Open dialog)")
+    if m & E_DIALOG:
+        return ("File name input field", "Open button", "Folder/address bar")
+    if m & E_HOTSPOT:
+        return ("Attach/+ area", "File picker elements (Open/Cancel)")
+    return ("Relevant UI control for next step",)
 
 
-def _cursor_correctness(payload: Dict[str, Any]) -> str:
+def _cursor_correctness(m: int) -> str:
     # We can't view the image pixels here; we use the point OCR preview & tags as evidence.
-    tag = str(payload.get("tag") or payload.get("step") or "")
-    point_preview = str(payload.get("point_preview") or "")
-    if not tag and not point_preview:
+    if m & F_NO_EVIDENCE:
         return "Unknown (no point OCR preview recorded for this image)"
 
-    if "more_options_upload" in tag.lower():
-        if "upload" in point_preview.lower():
+    if m & T_MO_UPLOAD:
+        if m & F_UPLOAD:
             return "Yes — point OCR includes 'Upload', consistent with hovering/clicking the Upload menu item."
         return "Unclear — tag indicates Upload target, but point OCR preview does not clearly contain 'Upload'."
 
-    if "input_plus_more_options" in tag.lower() or "more_options" == tag.lower():
-        if "more options" in point_preview.lower() or "+" in point_preview:
+    if m & (T_INPUT_PLUS_MO | T_MO_EXACT):
+        if m & (F_MORE_OPTIONS | F_PLUS):
             return "Yes — point OCR indicates the '+' / 'More options' affordance near the input."
         return "Unclear — tag indicates More options, but point OCR preview is weak/empty."
 
-    if "mouse_hotspot" in tag.lower():
-        if "open" in point_preview.lower() or "cancel" in point_preview.lower():
+    if m & T_MOUSE_HOTSPOT:
+        if m & (F_OPEN | F_CANCEL):
             return "Likely yes — point OCR shows 'Open'/'Cancel', consistent with hovering a file picker surface."
         return "Unclear — hotspot target without strong point OCR confirmation."
 
-    if "file name" in point_preview.lower() or "filename" in point_preview.lower():
+    if m & F_FILENAME:
         return "Yes — point OCR references the File name field."
 
     return "Unclear — insufficient OCR evidence to confirm the cursor is on the intended object."
 
 
-def _intended_next_action(payload: Dict[str, Any]) -> str:
-    tag = str(payload.get("tag") or payload.get("step") or "").lower()
-    point_preview = str(payload.get("point_preview") or "").lower()
-
-    if "more_options" in tag and "upload" not in tag:
+def _intended_next_action(m: int) -> str:
+    if m & T_MORE_OPTIONS and not m & T_UPLOAD:
         return "Open the flyout and select the Upload/Add files action based on OCR evidence."
-    if "upload" in tag or "upload" in point_preview:
+    if m & (T_UPLOAD | F_UPLOAD):
         return "Wait for the file picker and focus 'File name' (Alt+N), paste the full path, then press Enter/Open."
-    if "open" in point_preview or "cancel" in point_preview:
+    if m & (F_OPEN | F_CANCEL):
         return "Treat the foreground as the file picker, focus 'File name' (Alt+N), paste the full path, and confirm (Enter)."
-    return "Proceed to the next UI step indicated by the observed control." 
+    return "Proceed to the next UI step indicated by the observed control."
 
 
-def _previous_action(window: List[Dict[str, Any]], idx: int) -> str:
+def _location_expected(m: int) -> str:
+    if m & T_MORE_OPTIONS and not m & T_UPLOAD:
+        return "Yes — expected to be near the chat input where the '+' / More options lives."
+    if m & T_MO_UPLOAD:
+        return "Yes — expected to be in the More options flyout where Upload appears."
+    if m & (F_OPEN | F_CANCEL):
+        return "Yes — expected once the file picker opens."
+    return "Unclear — the tag/preview does not uniquely identify an expected region."
+
+
+def _table(rule: Callable[[int], Any], bits: int) -> Dict[int, Any]:
+    """Evaluate ``rule`` for every subset of ``bits``."""
+    table: Dict[int, Any] = {}
+    sub = bits
+    while True:
+        table[sub] = rule(sub)
+        if not sub:
+            return table
+        sub = (sub - 1) & bits
+
+
+_NEEDED_BITS = T_INPUT_PLUS_MO | T_MORE_OPTIONS | T_UPLOAD | T_MO_UPLOAD | F_UPLOAD | E_DIALOG | E_HOTSPOT
+_CURSOR_BITS = (
+    F_NO_EVIDENCE | T_MO_UPLOAD | T_INPUT_PLUS_MO | T_MO_EXACT | T_MOUSE_HOTSPOT
+    | F_UPLOAD | F_MORE_OPTIONS | F_PLUS | F_OPEN | F_CANCEL | F_FILENAME
+)
+_NEXT_BITS = T_MORE_OPTIONS | T_UPLOAD | F_UPLOAD | F_OPEN | F_CANCEL
+_LOCATION_BITS = T_MORE_OPTIONS | T_UPLOAD | T_MO_UPLOAD | F_OPEN | F_CANCEL
+_NEEDED_TABLE = _table(_guess_needed_objects, _NEEDED_BITS)
+_CURSOR_TABLE = _table(_cursor_correctness, _CURSOR_BITS)
+_NEXT_TABLE = _table(_intended_next_action, _NEXT_BITS)
+_LOCATION_TABLE = _table(_location_expected, _LOCATION_BITS)
+
+
+@lru_cache(maxsize=None)
+def _present_rule(obj: str) -> Tuple[int, Tuple[str, ...], str, str]:
+    """Return ``(token bits, fallback tokens, yes evidence, no evidence)`` for a needed object."""
+    key = obj.lower()
+    if "upload" in key:
+        return F_UPLOAD, (), "contains 'upload'", "no 'upload' found"
+    if "more options" in key or "+" in obj:
+        return F_MORE_OPTIONS | F_PLUS, (), "contains '+' or 'more options'", "no '+'/'more options' found"
+    if "file name" in key:
+        return F_FILENAME, (), "contains 'file name'", "no 'file name' found"
+    if "open" in key:
+        return F_OPEN, (), "contains 'open'", "no 'open' found"
+    # generic heuristic; arbitrary tokens are not in _TOKEN_RE, so these are
+    # matched by substring search over the evidence text
+    tokens = tuple(t for t in key.replace("(", " ").replace(")", " ").split() if len(t) >= 4)
+    return 0, tokens, "token match", "no token match"
+
+
+def _classify(ev: str, view: _PayloadView) -> _Verdict:
+    """Derive every per-image verdict from one set of flag bitmaps."""
+    ev_bits = 0
+    if "dialog" in ev or "file_picker" in ev:
+        ev_bits |= E_DIALOG
+    if "hotspot" in ev:
+        ev_bits |= E_HOTSPOT
+    pp_key = view.tag_bits | view.pp_bits
+    if not view.tag_l and not view.pp_l:
+        pp_key |= F_NO_EVIDENCE
+
+    needed = _NEEDED_TABLE[(view.tag_bits | view.prev_bits | ev_bits) & _NEEDED_BITS]
+    # Use OCR previews as evidence.
+    present = []
+    for obj in needed:
+        bits, tokens, yes, no = _present_rule(obj)
+        hit = bool(view.all_bits & bits) if bits else any(t in view.all_l for t in tokens)
+        present.append((obj, hit, yes if hit else no))
+
+    return _Verdict(
+        needed=needed,
+        present=present,
+        cursor=_CURSOR_TABLE[pp_key & _CURSOR_BITS],
+        next_action=_NEXT_TABLE[pp_key & _NEXT_BITS],
+        location=_LOCATION_TABLE[pp_key & _LOCATION_BITS],
+    )
+
+
+def _previous_action(wv: _EventView, idx: int) -> str:
     # Walk backwards for the last click/key/type.
     for j in range(idx - 1, -1, -1):
-        ev = str(window[j].get("event") or "")
+        ev = wv.ev[j]
         if ev in {
             "copilot_app_attach_click",
             "copilot_app_attach_key",
@@ -185,58 +459,43 @@ def _previous_action(window: List[Dict[str, Any]], idx: int) -> str:
             "copilot_app_dialog_click",
             "copilot_app_more_options_menu_pick",
         }:
-            tag = str(window[j].get("tag") or window[j].get("step") or window[j].get("name") or "")
-            return f"{ev} ({tag})"
+            return f"{ev} ({wv.act[j]})"
     return "Unknown (no prior action event found in window)"
 
 
-def _location_expected(payload: Dict[str, Any]) -> str:
-    tag = str(payload.get("tag") or payload.get("step") or "").lower()
-    point_preview = str(payload.get("point_preview") or "").lower()
-
-    if "more_options" in tag and "upload" not in tag:
-        return "Yes — expected to be near the chat input where the '+' / More options lives."
-    if "more_options_upload" in tag:
-        return "Yes — expected to be in the More options flyout where Upload appears."
-    if "open" in point_preview or "cancel" in point_preview:
-        return "Yes — expected once the file picker opens."
-    return "Unclear — the tag/preview does not uniquely identify an expected region."
-
-
-def _present_check(needed: List[str], payload: Dict[str, Any]) -> List[Tuple[str, bool, str]]:
-    # Use OCR previews as evidence.
-    text = "\n".join(
-        [
-            str(payload.get("point_preview") or ""),
-            str(payload.get("preview") or ""),
-            str(payload.get("ocr_preview") or ""),
-            "\n".join(payload.get("labels") or []) if isinstance(payload.get("labels"), list) else "",
-        ]
-    ).lower()
-    out = []
-    for obj in needed:
-        key = obj.lower()
-        hit = False
-        evidence = ""
-        if "upload" in key:
-            hit = "upload" in text
-            evidence = "contains 'upload'" if hit else "no 'upload' found"
-        elif "more options" in key or "+" in obj:
-            hit = "more options" in text or "+" in text
-            evidence = "contains '+' or 'more options'" if hit else "no '+'/'more options' found"
-        elif "file name" in key:
-            hit = "file name" in text or "filename" in text
-            evidence = "contains 'file name'" if hit else "no 'file name' found"
-        elif "open" in key:
-            hit = "open" in text
-            evidence = "contains 'open'" if hit else "no 'open' found"
-        else:
-            # generic heuristic
-            tokens = [t for t in key.replace("(", " ").replace(")", " ").split() if len(t) >= 4]
-            hit = any(t in text for t in tokens)
-            evidence = "token match" if hit else "no token match"
-        out.append((obj, hit, evidence))
-    return out
+def _nav_key(ev: str, tag: str) -> Optional[str]:
+    # We consider attach_observe variants and hotspot/menu steps as navigation
+    if ev.startswith("copilot_app_attach_observe"):
+        return tag or ev
+    tag_l = tag.lower()
+    if "menu_down" in ev or "menu" in tag_l or "hotspot" in tag_l:
+        return tag or ev
+    return None
+
+
+def _find_repeats(win: _EventView, threshold: int = 2) -> List[Dict[str, Any]]:
+    """Detect runs of identical consecutive navigation keys (simple heuristic).
+
+    Each window event maps to a small integer code (-1 for non-navigation
+    events); run boundaries are where the code changes, so only runs that
+    meet ``threshold`` are visited in Python.
+    """
+    codes: Dict[str, int] = {}
+    keys = [_nav_key(ev, tag) for ev, tag in zip(win.ev, win.nav)]
+    ids = [-1 if k is None else codes.setdefault(k, len(codes)) for k in keys]
+    if not ids:
+        return []
+    if np is not None:
+        arr = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        starts = np.flatnonzero(np.diff(arr)) + 1
+        bounds = [0, *starts.tolist(), len(ids)]
+    else:
+        bounds = [0, *(i for i in range(1, len(ids)) if ids[i] != ids[i - 1]), len(ids)]
+    repeats: List[Dict[str, Any]] = []
+    for start, stop in zip(bounds, bounds[1:]):
+        if stop - start >= threshold and ids[start] >= 0:
+            repeats.append({"start": start, "end": stop - 1, "key": keys[start], "count": stop - start})
+    return repeats
 
 
 def generate_md(
@@ -246,52 +505,17 @@ def generate_md(
     file_substr: Optional[str],
 ) -> Path:
     events = _load_jsonl(events_path)
-    target_file, window = _pick_target_run(events, file_substr)
-    imgs = _extract_images(window)
+    view = _event_view(events)
+    target_file, idxs = _pick_target_run(view, file_substr)
+    window = [events[i] for i in idxs]
+    wv = view.take(idxs)
+    imgs = _extract_images(window, wv)
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     lines: List[str] = []
     lines.append("# OCR Image Observations")
-    # Detect repeated navigation/menu/hotspot events (simple heuristic)
-    def _find_repeats(win: List[Dict[str, Any]], threshold: int = 2) -> List[Dict[str, Any]]:
-        repeats: List[Dict[str, Any]] = []
-        last_key = None
-        count = 0
-        start_idx = 0
-        for i, e in enumerate(win):
-            ev = str(e.get("event") or "")
-            tag = str(e.get("step") or e.get("tag") or "")
-            # We consider attach_observe variants and hotspot/menu steps as navigation
-            key = None
-            if ev.startswith("copilot_app_attach_observe"):
-                key = tag or ev
-            elif "menu_down" in ev or "menu" in tag.lower() or "hotspot" in tag.lower():
-                key = tag or ev
-
-            if key is None:
-                # reset
-                if count >= threshold and last_key:
-                    repeats.append({"start": start_idx, "end": i - 1, "key": last_key, "count": count})
-                last_key = None
-                count = 0
-                continue
-
-            if key == last_key:
-                count += 1
-            else:
-                if count >= threshold and last_key:
-                    repeats.append({"start": start_idx, "end": i - 1, "key": last_key, "count": count})
-                last_key = key
-                count = 1
-                start_idx = i
-
-        # flush
-        if count >= threshold and last_key:
-            repeats.append({"start": start_idx, "end": len(win) - 1, "key": last_key, "count": count})
-        return repeats
-
-    repeats = _find_repeats(window, threshold=2)
+    repeats = _find_repeats(wv, threshold=2)
     lines.append("")
     lines.append(f"- Source log: `{events_path.as_posix()}`")
     if target_file:
@@ -307,10 +531,8 @@ def generate_md(
         lines.append("The run contains consecutive repeated navigation/menu/hotspot observations which may indicate the agent navigated the same options repeatedly instead of committing. See examples below.")
         lines.append("")
         for r in repeats:
-            s = window[r["start"]]
-            e = window[r["end"]]
-            ts_s = str(s.get("ts") or "")
-            ts_e = str(e.get("ts") or "")
+            ts_s = wv.ts[r["start"]]
+            ts_e = wv.ts[r["end"]]
             lines.append(f"- `{r['key']}` repeated {r['count']} times — window {ts_s} → {ts_e}")
             # include up to 3 sample events from the repeat window
             sample_lines = []
@@ -328,10 +550,7 @@ def generate_md(
     lines.append("Use this to regenerate the report for a different run or output path:")
     lines.append("")
     lines.append("```powershell")
-    lines.append(
-        "C:/Users/yerbr/AI_Coder_Controller/Scripts/python.exe Scripts/generate_ocr_observations_md.py "
-        f"--events {example_events} --out {example_out} --file-substr {example_file}"
-    )
+    lines.append(_RERUN_TEMPLATE.format(events=example_events, out=example_out, substr=example_file))
     lines.append("```")
     lines.append("")
     lines.append("## How to use")
@@ -339,83 +558,87 @@ def generate_md(
     lines.append("Open each linked image and compare with the OCR preview text recorded next to it.")
     lines.append("")
 
-    # Build an index for previous action lookup.
-    index_by_img = {r.img_abs: i for i, r in enumerate(imgs)}
-
-    for idx, ref in enumerate(imgs, start=1):
-        rel = _relpath(workspace_root, ref.img_abs)
-        payload = ref.payload
-        needed = _guess_needed_objects(ref.event, payload)
-        present = _present_check(needed, payload)
-
-        # Find the payload position within the window to locate previous action.
-        # We approximate by searching the first matching ts+event+img.
-        win_idx = None
-        for j, e in enumerate(window):
-            if str(e.get("ts") or "") == ref.ts and str(e.get("event") or "") == ref.event:
-                if str(e.get(ref.key) or "") == ref.img_abs or (ref.key.startswith("image_paths") and ref.img_abs in (e.get("image_paths") or [])):
-                    win_idx = j
-                    break
-        prev_action = _previous_action(window, win_idx or 0)
-
-        lines.append(f"## {idx}. {ref.event} — {ref.context} — {ref.ts}")
-        lines.append("")
-        lines.append(f"**Image:** [{rel}]({rel})")
-        lines.append("")
-
-        # (1) objects needed
-        lines.append("### (1) Needed objects present?")
-        for obj, ok, evidence in present:
-            lines.append(f"- {obj}: {'YES' if ok else 'NO/UNCLEAR'} ({evidence})")
-        lines.append("")
-
-        # (2) cursor hovering correct object
-        lines.append("### (2) Cursor hovering correct object?")
-        lines.append(f"- { _cursor_correctness(payload) }")
-        lines.append("")
-
-        # (3) intended next action
-        lines.append("### (3) Intended next action")
-        lines.append(f"- { _intended_next_action(payload) }")
-        lines.append("")
-
-        # (4) previous action
-        lines.append("### (4) Previous action that led here")
-        lines.append(f"- {prev_action}")
-        lines.append("")
-
-        # (5) expected location
-        lines.append("### (5) Was this the location expected?")
-        lines.append(f"- { _location_expected(payload) }")
-        lines.append("")
+    # Build an index for previous action lookup: (ts, event, image path) -> first
+    # window position referencing it, so each image resolves in O(1).
+    win_index: Dict[Tuple[str, str, str], int] = {}
+    for j, e in enumerate(window):
+        e_ts = wv.ts[j]
+        e_ev = wv.ev[j]
+        paths = [e.get("point_image_path"), e.get("image_path")]
+        v2 = e.get("image_paths")
+        if isinstance(v2, list):
+            paths.extend(v2)
+        for p in paths:
+            if isinstance(p, str):
+                win_index.setdefault((e_ts, e_ev, p), j)
+
+    # Stream the report: the header goes out first, then one write per image
+    # section, so the whole document is never held as a single string.
+    with out_path.open("w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write("\n".join(lines))
+        for idx, ref in enumerate(imgs, start=1):
+            f.write("\n")
+            f.write(_image_section(workspace_root, idx, ref, wv, win_index))
+    return out_path
 
-        # (6) anything else
-        lines.append("### (6) Notes / anything else")
-        # Include compact evidence fields
-        point_preview = str(payload.get("point_preview") or "").strip()
-        preview = str(payload.get("preview") or "").strip()
-        ocr_preview = str(payload.get("ocr_preview") or "").strip()
-        labels = payload.get("labels") if isinstance(payload.get("labels"), list) else None
-
-        if point_preview:
-            lines.append(f"- point_preview: {point_preview[:260]}")
-        if preview and preview != point_preview:
-            lines.append(f"- preview: {preview[:260]}")
-        if ocr_preview and ocr_preview not in (preview, point_preview):
-            lines.append(f"- ocr_preview: {ocr_preview[:260]}")
-        if labels:
-            # Show a short list to avoid huge sections
-            sample = [str(x) for x in labels[:10] if str(x).strip()]
-            if sample:
-                lines.append(f"- labels(sample): {sample}")
-        # Include any probe info if present
-        for k in ("probe_name", "probe_control_type", "reason", "target", "step", "tag"):
-            if payload.get(k) not in (None, ""):
-                lines.append(f"- {k}: {str(payload.get(k))[:180]}")
-        lines.append("")
 
-    out_path.write_text("\n".join(lines), encoding="utf-8")
-    return out_path
+def _image_section(
+    workspace_root: Path,
+    idx: int,
+    ref: ImageRef,
+    wv: _EventView,
+    win_index: Dict[Tuple[str, str, str], int],
+) -> str:
+    """Render the markdown section for one referenced image."""
+    rel = _relpath(workspace_root, ref.img_abs)
+    payload = ref.payload
+    # Fetch the evidence fields once; every helper below works off these.
+    tag = str(payload.get("tag") or payload.get("step") or "")
+    pp = str(payload.get("point_preview") or "")
+    pv = str(payload.get("preview") or "")
+    op = str(payload.get("ocr_preview") or "")
+    labels = payload.get("labels") if isinstance(payload.get("labels"), list) else None
+    verdict = _classify(ref.event, _payload_view(tag, pp, pv, op, labels))
+
+    # Locate the payload within the window to find the previous action.
+    win_idx = win_index.get((ref.ts, ref.event, ref.img_abs), 0)
+    prev_action = _previous_action(wv, win_idx)
+
+    # Include compact evidence fields
+    notes: List[str] = []
+    point_preview = pp.strip()
+    preview = pv.strip()
+    ocr_preview = op.strip()
+
+    if point_preview:
+        notes.append(f"- point_preview: {point_preview[:260]}")
+    if preview and preview != point_preview:
+        notes.append(f"- preview: {preview[:260]}")
+    if ocr_preview and ocr_preview not in (preview, point_preview):
+        notes.append(f"- ocr_preview: {ocr_preview[:260]}")
+    if labels:
+        # Show a short list to avoid huge sections
+        sample = [str(x) for x in labels[:10] if str(x).strip()]
+        if sample:
+            notes.append(f"- labels(sample): {sample}")
+    # Include any probe info if present
+    extras = [(k, v) for k, v in zip(_EXTRA_KEYS, map(payload.get, _EXTRA_KEYS)) if v is not None and v != ""]
+    for k, v in extras:
+        notes.append(f"- {k}: {str(v)[:180]}")
+
+    return _IMAGE_SECTION.format(
+        idx=idx,
+        event=ref.event,
+        context=ref.context,
+        ts=ref.ts,
+        rel=rel,
+        present="\n".join(f"- {obj}: {'YES' if ok else 'NO/UNCLEAR'} ({evidence})" for obj, ok, evidence in verdict.present),
+        cursor=verdict.cursor,
+        next_action=verdict.next_action,
+        prev_action=prev_action,
+        location=verdict.location,
+        notes="".join("\n" + n for n in notes),
+    )
 
 
 def main() -> int:
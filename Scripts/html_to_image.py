@@ -1,33 +1,62 @@
 from __future__ import annotations
 
 import argparse
+import importlib.util
+import os
 import shutil
 import subprocess
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+# Probed once: whether Playwright is importable at all (without importing it).
+_HAS_PLAYWRIGHT = importlib.util.find_spec("playwright") is not None
 
 
 def _html_uri(path: Path) -> str:
     return path.resolve().as_uri()
 
 
-def render_with_playwright(html: Path, out_png: Path, width: int, height: int, full_page: bool, wait_ms: int) -> bool:
+def render_with_playwright(
+    html: Path,
+    out_png: Path,
+    width: int,
+    height: int,
+    full_page: bool,
+    wait_ms: int,
+    cancel: Optional[threading.Event] = None,
+) -> bool:
     try:
         from playwright.sync_api import sync_playwright  # type: ignore
     except Exception:
         return False
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page(viewport={"width": width, "height": height})
-        page.goto(_html_uri(html))
-        if wait_ms > 0:
-            page.wait_for_timeout(wait_ms)
-        page.screenshot(path=str(out_png), full_page=full_page)
-        browser.close()
-        return True
+    try:
+        with sync_playwright() as p:
+            # Raises when the package is installed but its browsers are not.
+            browser = p.chromium.launch()
+            try:
+                if cancel is not None and cancel.is_set():
+                    return False
+                page = browser.new_page(viewport={"width": width, "height": height})
+                page.goto(_html_uri(html))
+                if wait_ms > 0:
+                    page.wait_for_timeout(wait_ms)
+                if cancel is not None and cancel.is_set():
+                    return False
+                page.screenshot(path=str(out_png), full_page=full_page)
+                return True
+            finally:
+                browser.close()
+    except Exception:
+        return False
 
 
-def _find_browser_candidates() -> list[Path]:
+@lru_cache(maxsize=1)
+def _find_browser_candidates() -> Tuple[Path, ...]:
+    """Locate Chrome/Edge once per process; the result is reused by every render."""
     candidates = []
     # Common Windows locations for Chrome/Edge
     roots = [
@@ -42,10 +71,18 @@ def _find_browser_candidates() -> list[Path]:
         exe = shutil.which(name)
         if exe:
             candidates.append(Path(exe))
-    return candidates
+    return tuple(candidates)
 
 
-def render_with_headless(html: Path, out_png: Path, width: int, height: int, full_page: bool, wait_ms: int) -> bool:
+def render_with_headless(
+    html: Path,
+    out_png: Path,
+    width: int,
+    height: int,
+    full_page: bool,
+    wait_ms: int,
+    cancel: Optional[threading.Event] = None,
+) -> bool:
     browsers = _find_browser_candidates()
     if not browsers:
         return False
@@ -59,38 +96,182 @@ def render_with_headless(html: Path, out_png: Path, width: int, height: int, ful
     ]
     # Chromium-based allow a small delay via eval wait when needed; skip for simplicity
     try:
-        subprocess.run([str(browsers[0]), *args, url], check=True)
-        return out_png.exists()
+        proc = subprocess.Popen([str(browsers[0]), *args, url])
     except Exception:
         return False
+    while True:
+        try:
+            rc = proc.wait(timeout=0.1)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.is_set():
+                proc.terminate()
+                proc.wait()
+                return False
+    return rc == 0 and out_png.exists()
+
+
+def _unlink_quietly(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def _render_race(html_path: Path, out_png: Path, width: int, height: int) -> Optional[str]:
+    """Start Playwright and the headless browser together; keep the first PNG.
+
+    Only used for plain viewport shots: the headless browser ignores
+    ``full_page`` and ``wait_ms``, so those renders would depend on the winner.
+    Each renderer writes to its own temporary file so the loser can never
+    clobber the winner's output. The loser is cancelled but not waited for;
+    its temporary file is removed when it finishes. Returns the winning
+    renderer's label.
+    """
+    cancel = threading.Event()
+    jobs = {
+        "Playwright": (render_with_playwright, out_png.with_name(out_png.name + ".playwright.tmp.png")),
+        "headless browser": (render_with_headless, out_png.with_name(out_png.name + ".headless.tmp.png")),
+    }
+    winner: Optional[str] = None
+    pool = ThreadPoolExecutor(max_workers=2)
+    pending = {
+        pool.submit(fn, html_path, tmp, width, height, False, 0, cancel): label
+        for label, (fn, tmp) in jobs.items()
+    }
+    try:
+        while pending and winner is None:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                label = pending.pop(fut)
+                try:
+                    ok = fut.result()
+                except Exception:
+                    ok = False
+                if ok and winner is None:
+                    winner = label
+                    cancel.set()
+                    os.replace(jobs[label][1], out_png)
+                else:
+                    _unlink_quietly(jobs[label][1])
+    finally:
+        pool.shutdown(wait=False)
+    for fut, label in pending.items():
+        tmp = jobs[label][1]
+        fut.add_done_callback(lambda _fut, tmp=tmp: _unlink_quietly(tmp))
+    return winner
 
 
 def html_to_image(html_path: Path, out_png: Path, width: int, height: int, full_page: bool, wait_ms: int) -> None:
     out_png.parent.mkdir(parents=True, exist_ok=True)
-    # Try Playwright first
-    if render_with_playwright(html_path, out_png, width, height, full_page, wait_ms):
-        print(f"Rendered via Playwright → {out_png}")
-        return
-    # Fallback to headless browser
-    if render_with_headless(html_path, out_png, width, height, full_page, wait_ms):
-        print(f"Rendered via headless browser → {out_png}")
-        return
-    # Guidance
+    # When both renderers are available and would produce the same shot, overlap
+    # their start-up and keep the first result
+    if _HAS_PLAYWRIGHT and not full_page and wait_ms <= 0 and _find_browser_candidates():
+        winner = _render_race(html_path, out_png, width, height)
+        if winner:
+            print(f"Rendered via {winner} → {out_png}")
+            return
+    else:
+        # Try Playwright first
+        if render_with_playwright(html_path, out_png, width, height, full_page, wait_ms):
+            print(f"Rendered via Playwright → {out_png}")
+            return
+        # Fallback to headless browser
+        if render_with_headless(html_path, out_png, width, height, full_page, wait_ms):
+            print(f"Rendered via headless browser → {out_png}")
+            return
+    _print_install_guidance()
+
+
+def _print_install_guidance() -> None:
     print("ERROR: Could not render HTML to image. Install one of:\n"
           "  - Playwright: pip install playwright && python -m playwright install chromium\n"
           "  - Google Chrome or Microsoft Edge (headless) on PATH")
 
 
+def _render_batch_with_playwright(
+    pairs: Sequence[Tuple[Path, Path]], width: int, height: int, full_page: bool, wait_ms: int
+) -> List[bool]:
+    """Render every pair with one Chromium instance; returns per-pair success."""
+    results = [False] * len(pairs)
+    try:
+        from playwright.sync_api import sync_playwright  # type: ignore
+    except Exception:
+        return results
+
+    try:
+        with sync_playwright() as p:
+            # Raises when the package is installed but its browsers are not;
+            # every pair then falls back to the headless browser.
+            browser = p.chromium.launch()
+            try:
+                for i, (html, out_png) in enumerate(pairs):
+                    page = browser.new_page(viewport={"width": width, "height": height})
+                    try:
+                        page.goto(_html_uri(html))
+                        if wait_ms > 0:
+                            page.wait_for_timeout(wait_ms)
+                        page.screenshot(path=str(out_png), full_page=full_page)
+                        results[i] = True
+                    except Exception:
+                        pass
+                    finally:
+                        page.close()
+            finally:
+                browser.close()
+    except Exception:
+        pass
+    return results
+
+
+def html_to_images(
+    pairs: Sequence[Tuple[Path, Path]], width: int, height: int, full_page: bool, wait_ms: int
+) -> List[Path]:
+    """Render many ``(html, out_png)`` pairs, launching Playwright's browser once.
+
+    Pairs Playwright could not render fall back to the headless browser one
+    by one. Returns the PNG paths that were written.
+    """
+    for _html, out_png in pairs:
+        out_png.parent.mkdir(parents=True, exist_ok=True)
+    results = _render_batch_with_playwright(pairs, width, height, full_page, wait_ms)
+    rendered: List[Path] = []
+    for (html_path, out_png), ok in zip(pairs, results):
+        if ok:
+            print(f"Rendered via Playwright → {out_png}")
+        elif render_with_headless(html_path, out_png, width, height, full_page, wait_ms):
+            print(f"Rendered via headless browser → {out_png}")
+        else:
+            print(f"ERROR: Could not render {html_path}")
+            continue
+        rendered.append(out_png)
+    if len(rendered) < len(pairs) and not any(results) and not _find_browser_candidates():
+        _print_install_guidance()
+    return rendered
+
+
 def main():
     ap = argparse.ArgumentParser(description="Render an HTML file to a PNG image")
-    ap.add_argument("html", type=Path, help="Path to HTML file")
-    ap.add_argument("out", type=Path, help="Output PNG path")
+    ap.add_argument("html", type=Path, nargs="?", help="Path to HTML file")
+    ap.add_argument("out", type=Path, nargs="?", help="Output PNG path")
+    ap.add_argument("--html", dest="htmls", type=Path, action="append", default=[], help="Additional HTML file (repeatable; pairs with --out)")
+    ap.add_argument("--out", dest="outs", type=Path, action="append", default=[], help="Output PNG for the matching --html")
     ap.add_argument("--width", type=int, default=1200)
     ap.add_argument("--height", type=int, default=800)
     ap.add_argument("--full-page", action="store_true", help="Capture full page height")
     ap.add_argument("--wait-ms", type=int, default=0, help="Optional wait after load for JS to settle")
     args = ap.parse_args()
-    html_to_image(args.html, args.out, args.width, args.height, args.full_page, args.wait_ms)
+    if (args.html is None) != (args.out is None) or len(args.htmls) != len(args.outs):
+        ap.error("each HTML input needs a matching output path")
+    pairs = list(zip(args.htmls, args.outs))
+    if args.html is not None:
+        pairs.insert(0, (args.html, args.out))
+    if not pairs:
+        ap.error("no HTML input given")
+    if len(pairs) == 1:
+        html_to_image(pairs[0][0], pairs[0][1], args.width, args.height, args.full_page, args.wait_ms)
+    else:
+        html_to_images(pairs, args.width, args.height, args.full_page, args.wait_ms)
 
 
 if __name__ == "__main__":
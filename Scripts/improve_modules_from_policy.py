@@ -4,32 +4,34 @@ import json
 import re
 from pathlib import Path
 
+# Locate the 'default_cmds = [ ... ]' block inside focus_copilot_chat_view;
+# older versions might use 'cmds = [ ... ]'.
+_DEFAULT_CMDS_RE = re.compile(r"(default_cmds\s*=\s*\[)(.*?)(\])", re.S | re.M)
+_CMDS_RE = re.compile(r"(cmds\s*=\s*\[)(.*?)(\])", re.S | re.M)
+_QUOTED_RE = re.compile(r"['\"]([^'\"]+)['\"]")
+
+
 def update_vsbridge_focus_list(src: Path, banned: list[str]) -> dict:
     text = src.read_text(encoding="utf-8")
-    # Try to locate the 'default_cmds = [ ... ]' block inside focus_copilot_chat_view
-    pattern = r"(default_cmds\s*=\s*\[)(.*?)(\])"
-    m = re.search(pattern, text, flags=re.S|re.M)
+    m = _DEFAULT_CMDS_RE.search(text) or _CMDS_RE.search(text)
     if not m:
-        # Fallback: older versions might use 'cmds = [ ... ]'
-        pattern2 = r"(cmds\s*=\s*\[)(.*?)(\])"
-        m2 = re.search(pattern2, text, flags=re.S|re.M)
-        if not m2:
-            return {"updated": False, "reason": "command list not found"}
-        head, body, tail = m2.group(1), m2.group(2), m2.group(3)
-    else:
-        head, body, tail = m.group(1), m.group(2), m.group(3)
+        return {"updated": False, "reason": "command list not found"}
+    head, body, tail = m.group(1), m.group(2), m.group(3)
 
     # Extract quoted strings in the list
-    items = re.findall(r"['\"]([^'\"]+)['\"]", body)
+    items = _QUOTED_RE.findall(body)
     if not items:
         return {"updated": False, "reason": "no items parsed"}
 
     bl = [b for b in (banned or []) if b]
+    if not bl:
+        return {"updated": False, "reason": "no banned items present", "kept": items}
+    # One alternation scan per item instead of a substring test per banned entry.
+    banned_re = re.compile("|".join(re.escape(b) for b in bl))
     kept = []
     removed = []
     for it in items:
-        low = it.lower()
-        if any(b in low for b in bl):
+        if banned_re.search(it.lower()):
             removed.append(it)
         else:
             kept.append(it)
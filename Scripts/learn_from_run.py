@@ -1,27 +1,130 @@
 from __future__ import annotations
 import argparse
-import json
+import mmap
+import os
 import re
 import time
 from pathlib import Path
+from typing import Any, Iterable
 
+from src.cfg_cache import load_cfg
+from src.json_bytes import dumps as _dumps, loads as _loads
 
-def tail_lines(path: Path, max_lines: int = 400) -> list[str]:
+
+# Raw "ts" value of an error event, read before the line is decoded.
+_TS_RE = re.compile(rb'"ts"\s*:\s*"([^"]+)"')
+_PAL_RE = re.compile(rb"palette command='([^']+)'")
+# Event keys that may carry a command-like string.
+_CMD_KEYS = ("command", "cmd", "command_preview", "prompt", "text")
+# Solutions every failure lesson points at (shared by all lessons; only serialized).
+_SOLUTION_REFS = ("vscode.foreground_process_gate", "chat.ocr_readiness_gate", "palette.hygiene_esc")
+# Error types whose palette commands get added to policy.banned.
+_BAN_TRIGGERS = frozenset({"browser_foreground_detected", "foreground_not_vscode_before_send", "focus_failed", "palette_command_bypassed"})
+
+
+# Bytes re-scanned before the bisected --since-ts boundary, to tolerate
+# slightly out-of-order appends near it (the raw ts pre-filter skips them).
+_SINCE_SLACK = 64 * 1024
+
+
+def _since_offset(f: Any, since_b: bytes) -> int:
+    """Return a line-start offset in an append-ordered JSONL log at or before the
+    first line whose raw ``ts`` is >= ``since_b``.
+
+    Bisects over an mmap of the file, so only O(log n) lines are inspected.
+    Lines without a ts are treated as being inside the window.
+    """
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        return 0
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lo, hi = 0, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b"\n", 0, mid) + 1
+            end = mm.find(b"\n", mid)
+            if end < 0:
+                end = size
+            m = _TS_RE.search(mm, start, end)
+            if m and m.group(1).replace(b"T", b" ") < since_b:
+                lo = end + 1
+            else:
+                hi = start
+        if lo <= _SINCE_SLACK:
+            return 0
+        return mm.rfind(b"\n", 0, lo - _SINCE_SLACK) + 1
+
+
+def tail_lines(path: Path, max_lines: int = 400, block: int = 256 * 1024) -> list[bytes]:
+    """Return the last ``max_lines`` raw lines, reading only the end of the file."""
     if not path.exists():
         return []
-    data = path.read_text(encoding="utf-8", errors="ignore").splitlines()
-    return data[-max_lines:]
+    with path.open("rb") as f:
+        size = f.seek(0, 2)
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            lines = f.read().splitlines()
+            # The first line of a mid-file block is partial; widen until it is not needed.
+            if start == 0 or len(lines) > max_lines:
+                if start:
+                    lines = lines[1:]
+                return lines[-max_lines:]
+            block *= 2
 
 
 def write_jsonl(path: Path, obj: dict) -> None:
+    append_many(path, (obj,))
+
+
+def append_many(path: Path, objs: Iterable[dict]) -> None:
+    """Append every object as a JSONL record using a single open/write."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    with path.open("ab") as f:
+        f.writelines(_dumps(o) + b"\n" for o in objs)
+
+
+def seed_solutions(seed_path: Path, dest: Path) -> bool:
+    """Append the static seed records to ``dest`` unless it already ends with them.
+
+    The seed block is copied byte-for-byte, so no per-record serialization is
+    needed. Returns True when the block was appended.
+    """
+    if not seed_path.exists():
+        return False
+    seed = seed_path.read_bytes()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with dest.open("ab+") as f:
+        size = f.seek(0, 2)
+        if size >= len(seed):
+            f.seek(size - len(seed))
+            if f.read() == seed:
+                return False
+        f.write(seed)
+    return True
+
+
+def _harvest(d: dict, out: set[str]) -> None:
+    get = d.get
+    for k in _CMD_KEYS:
+        v = get(k)
+        if isinstance(v, str):
+            v = v.strip()
+            if v:
+                out.add(v)
 
 
 def write_json(path: Path, obj: dict) -> None:
+    # Write to a per-process temp file and swap it in, so concurrent runs and
+    # readers never observe a half-written artifact.
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(_dumps(obj, indent=True, newline=True))
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
 
 
 def main() -> int:
@@ -37,146 +140,136 @@ def main() -> int:
     error_commands_json = root / "projects" / "Self-Improve" / "error_commands.json"
     policy_path = root / "config" / "policy_rules.json"
 
-    # Parse error events
-    since_ts_num = 0.0
+    # Parse error events. Timestamps are "YYYY-MM-DD HH:MM:SS" (optionally with
+    # a "T"), which order lexicographically, so --since-ts is a string bound.
+    since_ts_str = ""
     if args.since_ts:
+        since_ts_str = args.since_ts.replace("T", " ")
         try:
-            t = time.strptime(args.since_ts.replace("T"," "), "%Y-%m-%d %H:%M:%S")
-            since_ts_num = time.mktime(t)
+            time.strptime(since_ts_str, "%Y-%m-%d %H:%M:%S")
         except Exception:
-            since_ts_num = 0.0
+            since_ts_str = ""
+    since_ts_b = since_ts_str.encode()
     events = []
     if errors_path.exists():
-        for line in errors_path.read_text(encoding="utf-8", errors="ignore").splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except Exception:
-                continue
-            ts_s = (obj.get("ts") or "").replace("T"," ")
-            try:
-                tt = time.strptime(ts_s, "%Y-%m-%d %H:%M:%S")
-                ts_n = time.mktime(tt)
-            except Exception:
-                ts_n = 0.0
-            if since_ts_num and ts_n < since_ts_num:
-                continue
-            events.append(obj)
+        with errors_path.open("rb") as f:
+            # The log is appended in time order: jump near the first event in
+            # the window instead of reading all earlier history.
+            if since_ts_b:
+                f.seek(min(_since_offset(f, since_ts_b), os.fstat(f.fileno()).st_size))
+            for raw in f:
+                # Events older than --since-ts are rejected from the raw ts
+                # string before paying for a decode + json.loads.
+                if since_ts_b:
+                    m = _TS_RE.search(raw)
+                    if m and m.group(1).replace(b"T", b" ") < since_ts_b:
+                        continue
+                line = raw.decode("utf-8", errors="ignore").strip()
+                if not line:
+                    continue
+                try:
+                    obj = _loads(line)
+                except Exception:
+                    continue
+                if since_ts_str:
+                    ts_s = (obj.get("ts") or "").replace("T", " ")
+                    # Truncated or otherwise malformed stamps are dropped, as before.
+                    if len(ts_s) != 19 or ts_s < since_ts_str:
+                        continue
+                events.append(obj)
 
     # Extract palette commands from commit log
     palette_cmds: set[str] = set()
     for ln in tail_lines(commit_log, 600):
-        m = re.search(r"palette command='([^']+)'", ln)
+        m = _PAL_RE.search(ln)
         if m:
-            palette_cmds.add(m.group(1))
+            palette_cmds.add(m.group(1).decode("utf-8", errors="ignore"))
 
-    # Extract command-like strings from error events (for a consolidated artifact)
+    # One pass over the events collects the command strings and event types for
+    # the consolidated artifact, the per-event lessons, and the ban inputs.
+    ts_now = time.strftime("%Y-%m-%d %H:%M:%S")
+    evidence = {
+        "errors": str(errors_path.relative_to(root)) if errors_path.exists() else "",
+        "commit_log": str(commit_log.relative_to(root)) if commit_log.exists() else "",
+    }
+    failed_commands = sorted(palette_cmds)
+    solution_refs = list(_SOLUTION_REFS)
     event_cmds: set[str] = set()
-    for e in events:
-        # Common top-level keys
-        for k in ("command", "cmd", "command_preview", "prompt", "text"):
-            v = e.get(k)
-            if isinstance(v, str) and v.strip():
-                event_cmds.add(v.strip())
-        # Nested data payload
-        data = e.get("data") or {}
+    err_types_set: set[str] = set()
+    bypass_cmds: set[str] = set()
+    needs_ban = False
+    lessons = []
+    for ev in events:
+        t = ev.get("type") or ev.get("event")
+        if t:
+            err_types_set.add(str(t).lower())
+        if isinstance(t, str) and t in _BAN_TRIGGERS:
+            needs_ban = True
+            # Gather commands from events (palette bypass) in addition to commit logs
+            if t == "palette_command_bypassed":
+                c = ev.get("command")
+                if c:
+                    bypass_cmds.add(str(c))
+        # Common top-level keys, then the nested data payload
+        _harvest(ev, event_cmds)
+        data = ev.get("data") or {}
         if isinstance(data, dict):
-            for k in ("command", "cmd", "command_preview", "prompt", "text"):
-                v = data.get(k)
-                if isinstance(v, str) and v.strip():
-                    event_cmds.add(v.strip())
+            _harvest(data, event_cmds)
+        # Record a lesson for each event type with related commands
+        lessons.append({
+            "ts": ts_now,
+            "kind": "failure",
+            "event_type": t or "unknown",
+            "message": ev.get("message") or "",
+            "data": data,
+            "failed_commands": failed_commands,
+            "evidence": evidence,
+            "solution_refs": solution_refs,
+        })
 
     # Write consolidated error-commands artifact for workflow evidence & downstream improvements
     try:
-        ts_now = time.strftime("%Y-%m-%d %H:%M:%S")
-        all_cmds = sorted({*palette_cmds, *event_cmds})
-        err_types = sorted({str((e.get("type") or e.get("event") or "")).lower() for e in events if (e.get("type") or e.get("event"))})
         write_json(
             error_commands_json,
             {
                 "ts": ts_now,
                 "since_ts": args.since_ts or "",
                 "num_events": len(events),
-                "event_types": err_types,
-                "palette_commands": sorted(palette_cmds),
+                "event_types": sorted(err_types_set),
+                "palette_commands": failed_commands,
                 "event_commands": sorted(event_cmds),
-                "all_commands": all_cmds,
-                "evidence": {
-                    "errors": str(errors_path.relative_to(root)) if errors_path.exists() else "",
-                    "commit_log": str(commit_log.relative_to(root)) if commit_log.exists() else "",
-                },
+                "all_commands": sorted({*palette_cmds, *event_cmds}),
+                "evidence": evidence,
             },
         )
     except Exception:
         pass
 
-    # Record lessons for each event type with related commands
-    ts_now = time.strftime("%Y-%m-%d %H:%M:%S")
-    for ev in events:
-        ev_type = (ev.get("type") or ev.get("event") or "unknown")
-        ev_msg = ev.get("message") or ""
-        data = ev.get("data") or {}
-        lesson = {
-            "ts": ts_now,
-            "kind": "failure",
-            "event_type": ev_type,
-            "message": ev_msg,
-            "data": data,
-            "failed_commands": sorted(palette_cmds),
-            "evidence": {
-                "errors": str(errors_path.relative_to(root)) if errors_path.exists() else "",
-                "commit_log": str(commit_log.relative_to(root)) if commit_log.exists() else ""
-            },
-            "solution_refs": ["vscode.foreground_process_gate","chat.ocr_readiness_gate","palette.hygiene_esc"],
-        }
-        write_jsonl(lessons_jsonl, lesson)
+    append_many(lessons_jsonl, lessons)
 
     # If we observed focus/browser or palette-bypass errors, add related palette commands to policy.banned
     try:
-        err_types = {(e.get("type") or e.get("event")) for e in events}
-        needs_ban = bool(err_types & {"browser_foreground_detected", "foreground_not_vscode_before_send", "focus_failed", "palette_command_bypassed"})
-        # Gather commands from events (palette bypass) in addition to commit logs
-        bypass_cmds = set()
-        for e in events:
-            if ((e.get("type") or e.get("event")) == "palette_command_bypassed") and e.get("command"):
-                try:
-                    bypass_cmds.add(str(e.get("command")))
-                except Exception:
-                    pass
-        to_ban = set(palette_cmds) | set(bypass_cmds)
+        to_ban = palette_cmds | bypass_cmds
         if needs_ban and to_ban:
             rules = {}
             if policy_path.exists():
                 try:
-                    rules = json.loads(policy_path.read_text(encoding="utf-8"))
+                    rules = load_cfg(policy_path)
                 except Exception:
                     rules = {}
-            pal = rules.get("palette") or {}
-            banned = set([str(x).lower() for x in (pal.get("banned") or [])])
-            for c in to_ban:
-                banned.add(c.lower())
+            # load_cfg results are shared; copy the levels modified below.
+            rules = dict(rules) if isinstance(rules, dict) else rules
+            pal = dict(rules.get("palette") or {})
+            banned = {str(x).lower() for x in (pal.get("banned") or [])}
+            banned.update(c.lower() for c in to_ban)
             pal["banned"] = sorted(banned)
             rules["palette"] = pal
-            policy_path.parent.mkdir(parents=True, exist_ok=True)
-            policy_path.write_text(json.dumps(rules, indent=2, ensure_ascii=False), encoding="utf-8")
+            write_json(policy_path, rules)
     except Exception:
         pass
 
-    # Seed solutions file entries (id + description)
-    solutions = [
-        {"id": "vscode.foreground_process_gate", "command": "Guard: proceed only when foreground process is Code.exe", "how": "Use GetWindowThreadProcessId to fetch process name and skip actions unless it is Code.exe."},
-        {"id": "chat.ocr_readiness_gate", "command": "Gate send on template/heuristic chat readiness", "how": "Use template match on chat input image or text heuristics to allow sending only when ready."},
-        {"id": "palette.hygiene_esc", "command": "Dismiss overlays with ESC and re-observe", "how": "If command palette/search is open, press ESC and capture again instead of typing."},
-        {"id": "error.input_wrong_search_palette", "command": "Detect and avoid typing in VS Code search/palette", "how": "OCR before/after palette open/type/enter; if overlay tokens (e.g., 'Search', 'Command Palette') are present, log error and skip typing."},
-        {"id": "copilot.app_send_and_read", "command": "Ensure Copilot app is foreground before send/read", "how": "Verify foreground via window title/class; log misfocus; wait and re-observe OCR until text stabilizes."},
-        {"id": "chat.cursor_field_verification", "command": "Verify chat input field via OCR before typing", "how": "Observe OCR before text input; check for chat input cues; if mismatch, log 'text_input_wrong_field' and abort."},
-        {"id": "ocr.observation_checklist", "command": "Observe OCR around TAB/TEXT/ENTER and response", "how": "1) before TAB, 2) after TAB, 3) before TEXT, 4) after TEXT, 5) after ENTER (assess reaction), 6) after Copilot response finishes (observe twice, then analyze)."},
-        {"id": "decision.policy.ocr_sequential_selection", "command": "Explicit selection after each OCR observe", "how": "After every OCR observe, choose among safe options: close overlay (ESC), adjust focus (toggle/scroll/tab), advance with TAB, type only when input confirmed ready, press ENTER only after pre-check, and for responses run read→wait 1.5s→re-read loops until stabilized or timeout; abstain on ambiguity."}
-    ]
-    for sol in solutions:
-        write_jsonl(solutions_jsonl, sol)
+    # Seed solutions file entries (id + description) from the static seed file
+    seed_solutions(root / "config" / "seed_solutions.jsonl", solutions_jsonl)
 
     # Persist user-provided assessment as a lesson for visibility
     user_assessment = {
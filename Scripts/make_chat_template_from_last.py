@@ -1,4 +1,5 @@
 from __future__ import annotations
+import os
 import sys
 from pathlib import Path
 import shutil
@@ -8,8 +9,22 @@ import time
 def find_latest_png(folder: Path) -> Path | None:
     if not folder.exists():
         return None
-    candidates = sorted(folder.glob("*.png"), key=lambda p: p.stat().st_mtime, reverse=True)
-    return candidates[0] if candidates else None
+    # Single pass for the newest PNG; DirEntry.stat() is served from the
+    # directory listing on Windows. normcase matches glob's case rules.
+    best = None
+    best_mt = -1.0
+    with os.scandir(folder) as it:
+        for e in it:
+            if not os.path.normcase(e.name).endswith(".png"):
+                continue
+            try:
+                mt = e.stat().st_mtime
+            except OSError:
+                continue
+            if mt > best_mt:
+                best_mt = mt
+                best = e.path
+    return Path(best) if best else None
 
 
 def main() -> int:
@@ -1,10 +1,25 @@
 from __future__ import annotations
 import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable
 
-SUPPORTED_EXT = {".png", ".jpg", ".jpeg", ".mp4", ".gif"}
+SUPPORTED_EXT = frozenset({".png", ".jpg", ".jpeg", ".mp4", ".gif"})
+_MARKER_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def _write_marker(path: str, marker_ext: str) -> bool:
+    try:
+        fd = os.open(path + marker_ext, _MARKER_FLAGS, 0o644)
+        try:
+            os.write(fd, b"assessed\n")
+        finally:
+            os.close(fd)
+        return True
+    except OSError:
+        return False
+
 
 def mark_path(p: Path, marker_ext: str = ".assessed") -> bool:
     try:
@@ -12,19 +27,36 @@ def mark_path(p: Path, marker_ext: str = ".assessed") -> bool:
             return False
         if p.suffix.lower() not in SUPPORTED_EXT:
             return False
-        marker = Path(str(p) + marker_ext)
-        marker.parent.mkdir(parents=True, exist_ok=True)
-        marker.write_text("assessed\n", encoding="utf-8")
-        return True
+        return _write_marker(str(p), marker_ext)
     except Exception:
         return False
 
-def iter_media(root: Path) -> Iterable[Path]:
-    for r, _d, files in os.walk(root):
-        for f in files:
-            p = Path(r) / f
-            if p.suffix.lower() in SUPPORTED_EXT:
-                yield p
+
+def _mark_entry(entry: os.DirEntry, marker_ext: str) -> bool:
+    try:
+        return entry.is_file() and _write_marker(entry.path, marker_ext)
+    except OSError:
+        return False
+
+
+def iter_media(root: Path) -> Iterable[os.DirEntry]:
+    """Yield supported media entries under ``root`` (symlinked dirs are not followed)."""
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                except OSError:
+                    continue
+                if os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXT:
+                    yield entry
 
 
 def main():
@@ -42,10 +74,11 @@ def main():
     for s in args.paths:
         p = Path(s)
         if p.is_dir():
-            for f in iter_media(p):
-                total += 1
-                if mark_path(f, args.marker_ext):
-                    marked += 1
+            # Marker writes are small and I/O bound; overlap them on a few threads.
+            entries = list(iter_media(p))
+            total += len(entries)
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                marked += sum(pool.map(_mark_entry, entries, [args.marker_ext] * len(entries)))
         elif p.is_file():
             total += 1
             if mark_path(p, args.marker_ext):
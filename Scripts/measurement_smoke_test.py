@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-import json
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
+from src.cfg_cache import load_cfg
+from src.json_bytes import dumps as _dumps, loads as _loads
 from src.ocr import CopilotOCR
 
 try:
@@ -13,16 +15,70 @@ except Exception:  # pragma: no cover - optional dependency
     cv2 = None  # type: ignore
 
 
-def template_ready(image_path: Path, template_path: Path, threshold: float) -> bool:
+
+# Optional coarse pass (measurement.coarse_pass, off by default): anything
+# scoring this far below the threshold at half resolution is rejected without
+# the full-resolution correlation. Thin or fine-detailed templates can score
+# much lower when halved, so enabling it may turn a real match into a miss.
+# Templates smaller than _PYRAMID_MIN_SIDE always take the exact path.
+_PYRAMID_MARGIN = 0.1
+_PYRAMID_MIN_SIDE = 32
+
+
+@lru_cache(maxsize=32)
+def _load_gray(path: str, mtime_ns: int) -> Any:
+    # mtime_ns is part of the key so an edited template is re-read.
+    return cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+
+
+@lru_cache(maxsize=32)
+def _pyr_down(path: str, mtime_ns: int) -> Any:
+    return cv2.pyrDown(_load_gray(path, mtime_ns))
+
+
+def _parse_roi(value: Any) -> Optional[Tuple[int, int, int, int]]:
+    try:
+        x, y, w, h = (int(v) for v in value)
+    except Exception:
+        return None
+    if w <= 0 or h <= 0:
+        return None
+    return x, y, w, h
+
+
+def template_ready(
+    image_path: Path,
+    template_path: Path,
+    threshold: float,
+    roi: Optional[Tuple[int, int, int, int]] = None,
+    coarse: bool = False,
+) -> bool:
+    """Return True if ``template_path`` matches inside ``image_path``.
+
+    ``roi`` is an optional ``(x, y, w, h)`` in image coordinates; when it can
+    hold the template, matching is limited to that region. ``coarse`` enables
+    the half-resolution early reject, trading possible false negatives for
+    speed.
+    """
     if cv2 is None:
         return False
     if (not image_path) or (not template_path.exists()) or (not image_path.exists()):
         return False
     try:
         img = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
-        tpl = cv2.imread(str(template_path), cv2.IMREAD_GRAYSCALE)
+        tpl_key = (str(template_path), template_path.stat().st_mtime_ns)
+        tpl = _load_gray(*tpl_key)
         if img is None or tpl is None:
             return False
+        if roi is not None:
+            x, y, w, h = roi
+            crop = img[max(0, y):y + h, max(0, x):x + w]
+            if crop.shape[0] >= tpl.shape[0] and crop.shape[1] >= tpl.shape[1]:
+                img = crop
+        if coarse and min(tpl.shape[:2]) >= _PYRAMID_MIN_SIDE:
+            coarse = cv2.matchTemplate(cv2.pyrDown(img), _pyr_down(*tpl_key), cv2.TM_CCOEFF_NORMED)
+            if cv2.minMaxLoc(coarse)[1] < float(threshold) - _PYRAMID_MARGIN:
+                return False
         res = cv2.matchTemplate(img, tpl, cv2.TM_CCOEFF_NORMED)
         _min_val, max_val, _min_loc, _max_loc = cv2.minMaxLoc(res)
         return bool(max_val >= float(threshold))
@@ -41,28 +97,33 @@ def main() -> int:
     templates_path = cfg_dir / "templates.json"
 
     try:
-        ocr_cfg = json.loads(ocr_cfg_path.read_text(encoding="utf-8")) if ocr_cfg_path.exists() else {"enabled": True}
+        ocr_cfg = _loads(ocr_cfg_path.read_bytes()) if ocr_cfg_path.exists() else {"enabled": True}
     except Exception:
         ocr_cfg = {"enabled": True}
 
     try:
-        rules = json.loads(policy_path.read_text(encoding="utf-8")) if policy_path.exists() else {}
+        rules = load_cfg(policy_path) if policy_path.exists() else {}
     except Exception:
         rules = {}
 
     meas_cfg = (rules.get("measurement") or {}) if isinstance(rules, dict) else {}
     threshold = float(meas_cfg.get("threshold", 0.85))
+    coarse_pass = bool(meas_cfg.get("coarse_pass", False))
 
     templates_cfg: Dict[str, Any] = {}
     try:
         if templates_path.exists():
-            templates_cfg = json.loads(templates_path.read_text(encoding="utf-8")) or {}
+            templates_cfg = load_cfg(templates_path) or {}
     except Exception:
         templates_cfg = {}
 
     chat_templates: List[Path] = []
+    chat_roi: Optional[Tuple[int, int, int, int]] = None
     try:
-        rels = (templates_cfg.get("chat_input", {}) or {}).get("templates", []) or []
+        chat_cfg = templates_cfg.get("chat_input", {}) or {}
+        # Optional "roi": [x, y, w, h] of the chat input within the capture.
+        chat_roi = _parse_roi(chat_cfg.get("roi"))
+        rels = chat_cfg.get("templates", []) or []
         for rel in rels:
             try:
                 p = (root / str(rel)).resolve()
@@ -87,16 +148,21 @@ def main() -> int:
             "error": f"capture_failed:{e}",
         }
         out_path = logs_dir / f"measurement_smoke_{time.strftime('%Y%m%d_%H%M%S')}.json"
-        out_path.write_text(json.dumps(out, indent=2), encoding="utf-8")
+        out_path.write_bytes(_dumps(out, indent=True))
         return 1
 
     img_path = Path(str(res.get("image_path") or "")) if isinstance(res, dict) else None
     elems = (res.get("elements") or []) if isinstance(res, dict) else []
 
+    capture_ok = bool(res.get("ok", False)) if isinstance(res, dict) else False
     matches: List[Dict[str, Any]] = []
-    if img_path and img_path.exists() and chat_templates:
+    skipped = ""
+    if not capture_ok and chat_templates:
+        # No usable capture: matching templates against it would be wasted work.
+        skipped = "skipped_no_ok"
+    elif img_path and img_path.exists() and chat_templates:
         for tpl in chat_templates:
-            ok = template_ready(img_path, tpl, threshold=threshold)
+            ok = template_ready(img_path, tpl, threshold=threshold, roi=chat_roi, coarse=coarse_pass)
             matches.append({
                 "template": str(tpl.relative_to(root)),
                 "matched": bool(ok),
@@ -104,15 +170,17 @@ def main() -> int:
 
     out = {
         "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "ok": bool(res.get("ok", False)) if isinstance(res, dict) else False,
+        "ok": capture_ok,
         "image_path": str(img_path) if img_path else "",
         "elements": len(elems),
         "threshold": threshold,
         "templates": matches,
     }
+    if skipped:
+        out["templates_skipped"] = skipped
 
     out_path = logs_dir / f"measurement_smoke_{time.strftime('%Y%m%d_%H%M%S')}.json"
-    out_path.write_text(json.dumps(out, indent=2), encoding="utf-8")
+    out_path.write_bytes(_dumps(out, indent=True))
     return 0
 
 
@@ -1,4 +1,6 @@
 import argparse
+import queue
+import threading
 import time
 import os
 import sys
@@ -54,6 +56,20 @@ def open_writer(path: str, fps: int, size: Tuple[int, int]) -> cv2.VideoWriter:
     return writer
 
 
+def _writer_worker(writer: cv2.VideoWriter, frames: "queue.Queue", free: "queue.Queue") -> None:
+    # Encode off the capture thread; each buffer goes back to the pool once written.
+    while True:
+        f = frames.get()
+        if f is None:
+            break
+        try:
+            writer.write(f)
+        except Exception:
+            pass  # keep draining so the capture loop never blocks on a dead writer
+        finally:
+            free.put(f)
+
+
 def ensure_dirs(path: str) -> None:
     d = os.path.dirname(os.path.abspath(path))
     if d and not os.path.exists(d):
@@ -108,26 +124,47 @@ def main() -> int:
             x, y, w, h = args.region
             mon_rect = {"left": x, "top": y, "width": w, "height": h}
 
+    # Output buffers reused across frames (reallocated only if the shape changes,
+    # e.g. after a backend switch) so the capture loop does not allocate per frame.
+    bufs = {}
+
+    def _buf(key: str, shape: Tuple[int, ...]) -> np.ndarray:
+        b = bufs.get(key)
+        if b is None or b.shape != shape:
+            b = bufs[key] = np.empty(shape, np.uint8)
+        return b
+
+    def _to_bgr(frame: np.ndarray) -> np.ndarray:
+        if frame.shape[2] == 3:
+            return frame
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=_buf("bgr", frame.shape[:2] + (3,)))
+
     # Grab one frame to determine size
     consecutive_none = 0
+    # The camera runs in video mode, so frames come from dxcam's ring buffer;
+    # grab() (a fresh capture + array per call) is kept as a fallback.
+    dx_latest = True
     def grab_frame():
+        nonlocal dx_latest
         if use_dxcam:
-            frame = camera.grab()
+            frame = None
+            if dx_latest:
+                try:
+                    frame = camera.get_latest_frame()
+                except Exception:
+                    dx_latest = False
+            if not dx_latest:
+                frame = camera.grab()
             if frame is None:
                 return None
-            # dxcam returns BGRA
-            if frame.shape[2] == 4:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-            # Optional region crop
+            # Optional region crop (a view), then convert only those pixels; dxcam returns BGRA
             if args.region is not None:
                 x, y, w, h = args.region
                 frame = frame[y:y+h, x:x+w]
-            return frame
+            return _to_bgr(frame)
         else:
             img = sct.grab(mon_rect)
-            frame = np.array(img)  # BGRA
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-            return frame
+            return _to_bgr(np.asarray(img))  # BGRA view over the grabbed bytes
 
     first = None
     t0 = time.time()
@@ -173,9 +210,18 @@ def main() -> int:
 
     h, w = first.shape[:2]
     writer = None
+    writer_thread = None
+    frames_q: "queue.Queue" = queue.Queue(maxsize=4)
+    free_q: "queue.Queue" = queue.Queue()
     if args.out:
         ensure_dirs(args.out)
         writer = open_writer(args.out, args.fps, (w, h))
+        # A fixed pool of frame buffers bounds memory: when the encoder falls
+        # behind, capture blocks on the pool instead of queueing without limit.
+        for _ in range(4):
+            free_q.put(np.empty((h, w, 3), np.uint8))
+        writer_thread = threading.Thread(target=_writer_worker, args=(writer, frames_q, free_q), daemon=True)
+        writer_thread.start()
 
     window_name = "Monitor Live"
     if args.preview:
@@ -183,7 +229,11 @@ def main() -> int:
         cv2.resizeWindow(window_name, max(320, int(w * 0.6)), max(240, int(h * 0.6)))
 
     interval = 1.0 / max(args.fps, 1)
-    next_tick = time.perf_counter()
+    # Frame deadlines are measured from pace_t0 so sleep overshoot does not
+    # accumulate; the clock is re-anchored when we fall more than a frame behind.
+    pace_t0 = time.perf_counter()
+    paced_frames = 0
+    dropped = 0
     end_at = (time.time() + args.seconds) if args.seconds > 0 else None
 
     try:
@@ -213,23 +263,42 @@ def main() -> int:
                     continue
             consecutive_none = 0
             if args.scale != 1.0:
-                frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+                frame = cv2.resize(frame, (w, h), dst=_buf("scaled", (h, w, 3)), interpolation=cv2.INTER_AREA)
             if writer is not None:
-                writer.write(frame)
+                try:
+                    buf = free_q.get_nowait()
+                except queue.Empty:
+                    # Encoder is behind: drop this frame rather than stall capture.
+                    buf = None
+                    dropped += 1
+            if writer is not None and buf is not None:
+                if buf.shape == frame.shape:
+                    np.copyto(buf, frame)
+                else:
+                    buf = frame.copy()
+                frames_q.put(buf)
             if args.preview:
                 cv2.imshow(window_name, frame)
                 if cv2.waitKey(1) == 27:  # ESC
                     break
             if end_at is not None and time.time() >= end_at:
                 break
-            # fps pacing
-            next_tick += interval
-            sleep = next_tick - time.perf_counter()
+            # fps pacing: coarse sleep to ~1 ms before the deadline, then spin
+            paced_frames += 1
+            deadline = pace_t0 + paced_frames * interval
+            sleep = deadline - time.perf_counter()
             if sleep > 0:
-                time.sleep(sleep)
-            else:
-                next_tick = time.perf_counter()
+                if sleep > 0.002:
+                    time.sleep(sleep - 0.001)
+                while time.perf_counter() < deadline:
+                    pass
+            elif sleep < -interval:
+                pace_t0 = time.perf_counter()
+                paced_frames = 0
     finally:
+        if writer_thread is not None:
+            frames_q.put(None)
+            writer_thread.join()
         if writer is not None:
             writer.release()
         if args.preview:
@@ -246,6 +315,8 @@ def main() -> int:
                 pass
     if args.out:
         print(f"Saved video: {args.out}")
+        if dropped:
+            print(f"Dropped {dropped} frame(s) while the encoder was behind", file=sys.stderr)
         if args.mark_assessed:
             try:
                 marker_path = args.out + (args.marker_ext or ".assessed")
@@ -1,5 +1,4 @@
 from __future__ import annotations
-import json
 import sys
 import time
 from pathlib import Path
@@ -8,6 +7,8 @@ from src.control import Controller, SafetyLimits
 from src.vsbridge import VSBridge
 from src.windows import WindowsManager
 from src.ocr import CopilotOCR
+from src.cfg_cache import load_cfg
+from src.json_bytes import dumps
 from src.jsonlog import JsonActionLogger
 
 
@@ -16,7 +17,7 @@ def write_report(root: Path, report: dict) -> Path:
     out_dir.mkdir(parents=True, exist_ok=True)
     ts = time.strftime("%Y%m%d_%H%M%S")
     out_path = out_dir / f"navigation_test_{ts}.json"
-    out_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    out_path.write_bytes(dumps(report, indent=True))
     return out_path
 
 
@@ -26,7 +27,7 @@ def main():
     rules_path = root / "config" / "policy_rules.json"
     ocr_cfg_path = root / "config" / "ocr.json"
     try:
-        rules = json.loads(rules_path.read_text(encoding="utf-8"))
+        rules = load_cfg(rules_path)
     except Exception:
         rules = {}
     vs_cfg = rules.get("vsbridge", {}) or {}
@@ -39,16 +40,25 @@ def main():
     except Exception:
         get_controls_state = None  # type: ignore
     if get_controls_state is not None:
+        # Controller may consult the gate per input event; re-read the shared
+        # state file at most every 100 ms.
+        _gate_cache = [float("-inf"), True]
+
         def _controls_gate() -> bool:
+            now = time.monotonic()
+            if now - _gate_cache[0] < 0.1:
+                return _gate_cache[1]
             try:
                 st = get_controls_state(root) or {}
                 owner = str(st.get("owner", "") or "")
                 # Allow when no owner or when invoked under the workflow_test
                 # umbrella; yield when another independent workflow (e.g., Agent
                 # Mode) owns controls.
-                return (not owner) or (owner == "workflow_test")
+                ok = (not owner) or (owner == "workflow_test")
             except Exception:
-                return True
+                ok = True
+            _gate_cache[:] = [now, ok]
+            return ok
         ctrl.set_window_gate(_controls_gate)
     try:
         kb_cfg = rules.get("keyboard", {}) or {}
@@ -62,7 +72,7 @@ def main():
 
     # OCR setup
     try:
-        ocr_cfg = json.loads(ocr_cfg_path.read_text(encoding="utf-8"))
+        ocr_cfg = load_cfg(ocr_cfg_path)
     except Exception:
         ocr_cfg = {"enabled": True}
     ocr_debug = root / "logs" / "ocr"
@@ -1,60 +1,84 @@
 from __future__ import annotations
 import argparse
-import json
+import atexit
 import time
 from pathlib import Path
 import os
 
 from src.windows import WindowsManager
+from src.win_classify import WindowKind, classify_window
+from src.json_bytes import dumps
 
 
-DISALLOWED_TITLES = [
-    "microsoft edge",
-]
-DISALLOWED_SUBSTRINGS = [
-    "github",
-    "github copilot coding agent",
-]
-ALLOWED_HINTS = [
-    "visual studio code",
-    "copilot",
-]
+# (epoch second, formatted stamp): records within the same second share one string.
+_ts_cache = [-1, ""]
 
 
-def write_jsonl(log_path: Path, obj: dict) -> None:
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    with log_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+def _ts_now() -> str:
+    s = int(time.time())
+    if s != _ts_cache[0]:
+        _ts_cache[:] = [s, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(s))]
+    return _ts_cache[1]
+
+
+class JsonlWriter:
+    """Append-only JSONL file kept open for the life of the process.
+
+    Records are block-buffered and flushed every ``flush_every`` writes, on
+    ``close()`` and at interpreter exit, instead of reopening the file per record.
+    """
+
+    def __init__(self, path: Path, flush_every: int = 10):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.flush_every = max(1, int(flush_every))
+        self._pending = 0
+        self._fh = path.open("ab", buffering=65536)
+        atexit.register(self.close)
+
+    def write(self, obj: dict, end_of_batch: bool = False) -> None:
+        self._fh.write(dumps(obj, newline=True))
+        self._pending += 1
+        if end_of_batch or self._pending >= self.flush_every:
+            self._fh.flush()
+            self._pending = 0
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+
+_error_writer = None
 
 
 def write_error_event(root: Path, type_: str, message: str, data: dict) -> None:
+    global _error_writer
     try:
-        err_dir = root / "logs" / "errors"
-        err_dir.mkdir(parents=True, exist_ok=True)
-        with (err_dir / "events.jsonl").open("a", encoding="utf-8") as f:
-            f.write(json.dumps({
-                "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "source": "observe_and_react.py",
-                "type": type_,
-                "message": message,
-                "data": data,
-            }) + "\n")
+        if _error_writer is None:
+            # Error events are rare and read by other tools while we run: flush each one.
+            _error_writer = JsonlWriter(root / "logs" / "errors" / "events.jsonl", flush_every=1)
+        _error_writer.write({
+            "ts": _ts_now(),
+            "source": "observe_and_react.py",
+            "type": type_,
+            "message": message,
+            "data": data,
+        })
     except Exception:
         pass
 
 
 def should_close(title: str, cls: str) -> bool:
-    t = title.lower()
-    c = cls.lower()
-    if any(h in t for h in ALLOWED_HINTS):
+    return _should_close_kind(classify_window(title))
+
+
+def _should_close_kind(kind: WindowKind) -> bool:
+    if kind & (WindowKind.VSCODE | WindowKind.COPILOT):
         return False
-    if any(k in t for k in DISALLOWED_TITLES):
+    if kind & WindowKind.MSEDGE:
         return True
-    if any(s in t for s in DISALLOWED_SUBSTRINGS):
-        # heuristic: VS Code also shows github in title if a GH file open; require browser-ish hint
-        if "edge" in t or " - microsoft edge" in t:
-            return True
-    return False
+    # heuristic: VS Code also shows github in title if a GH file open; require browser-ish hint
+    return bool(kind & WindowKind.GITHUB) and bool(kind & WindowKind.EDGE)
 
 
 def main() -> int:
@@ -62,24 +86,48 @@ def main() -> int:
     ap.add_argument("--ticks", type=int, default=20, help="Number of observation ticks")
     ap.add_argument("--interval-ms", type=int, default=500, help="Interval between ticks")
     ap.add_argument("--log", type=str, default="logs/tests/observe_react.jsonl", help="JSONL log path")
+    ap.add_argument(
+        "--duration-s",
+        type=float,
+        default=0.0,
+        help="Event-driven mode: react to each foreground change for this many seconds instead of polling --ticks",
+    )
+    ap.add_argument(
+        "--heartbeat",
+        type=int,
+        default=20,
+        help="Log an unchanged idle foreground only every N ticks (1 = log every tick)",
+    )
     args = ap.parse_args()
 
     root = Path(__file__).resolve().parent.parent
     log_path = Path(args.log)
+    log = JsonlWriter(log_path)
     win = WindowsManager()
-
-    for i in range(max(1, args.ticks)):
-        ts = time.strftime("%Y-%m-%d %H:%M:%S")
-        hwnd = win.get_foreground()
+    # Foreground info from the previous tick; while the same hwnd stays in front
+    # only its title is re-read (class/pid/process cannot change).
+    last_hwnd = None
+    last_info: dict = {}
+    # Key of the last row written: idle ticks repeating it are not logged again
+    # (except as a heartbeat); ticks that close a window are always logged.
+    last_key = None
+    heartbeat = max(1, args.heartbeat)
+
+    def observe(tick: int, hwnd) -> None:
+        nonlocal last_hwnd, last_info, last_key
+        ts = _ts_now()
         info = {"hwnd": 0, "title": "", "class": ""}
-        if hwnd:
+        if hwnd and hwnd == last_hwnd:
+            info = dict(last_info, title=win.get_window_title(hwnd))
+        elif hwnd:
             info = win.get_window_info(hwnd)
+        last_hwnd, last_info = hwnd, info
         title = info.get("title", "")
         cls = info.get("class", "")
         action = "none"
         reason = ""
         if hwnd and title:
-            if should_close(title, cls):
+            if _should_close_kind(classify_window(title)):
                 try:
                     ok = win.close_hwnd(int(info.get("hwnd", 0)))
                 except Exception:
@@ -87,15 +135,36 @@ def main() -> int:
                 action = "close" if ok else "close_failed"
                 reason = f"Disallowed foreground: title='{title}', class='{cls}'"
                 write_error_event(root, "browser_foreground_closed" if ok else "browser_close_failed", reason, {"title": title, "class": cls})
-        write_jsonl(log_path, {
+        key = (hwnd, title, cls, action)
+        if action == "none" and key == last_key and tick % heartbeat != 0:
+            return
+        last_key = key
+        log.write({
             "timestamp": ts,
-            "tick": i+1,
+            "tick": tick,
             "foreground": info,
             "action": action,
             "reason": reason,
         })
-        time.sleep(max(0, args.interval_ms) / 1000.0)
 
+    watched = False
+    if args.duration_s > 0:
+        # Check whatever is in front now, then one record per foreground change.
+        tick = 1
+        observe(tick, win.get_foreground())
+
+        def on_foreground(hwnd: int) -> None:
+            nonlocal tick
+            tick += 1
+            observe(tick, hwnd)
+
+        watched = win.watch_foreground(on_foreground, args.duration_s)
+    if not watched:
+        for i in range(max(1, args.ticks)):
+            observe(i + 1, win.get_foreground())
+            time.sleep(max(0, args.interval_ms) / 1000.0)
+
+    log.close()
     print(f"Observer finished. Log: {log_path}")
     return 0
 
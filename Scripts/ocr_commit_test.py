@@ -1,24 +1,48 @@
 from __future__ import annotations
-import json
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 
 from src.control import Controller, SafetyLimits
 from src.vsbridge import VSBridge
 from src.windows import WindowsManager
-from src.ocr import CopilotOCR
+from src.win_classify import WindowKind, classify_window
+from src.ocr import CachedOCR, CopilotOCR, frame_digest, wait_until_settled
+from src.cfg_cache import load_cfg
+from src.json_bytes import dumps
 
 
-def append_improvements(root: Path, title: str, text: str) -> Path | None:
-    if not text:
+def _frame_changing(ocr: Any, wait_s: float = 0.1, region: Any = None) -> bool:
+    # Two samples wait_s apart of the ROI that was actually captured (``region``
+    # is the region_percent override used for it, None for the default ROI); an
+    # unchanged (or uncapturable) region means a re-capture after the long
+    # fallback sleep would see the same idle frame.
+    orig = getattr(ocr, "region_percent", None)
+    if region is not None:
+        setattr(ocr, "region_percent", region)
+    try:
+        h1 = frame_digest(ocr)
+        time.sleep(wait_s)
+        h2 = frame_digest(ocr)
+    finally:
+        if region is not None:
+            setattr(ocr, "region_percent", orig)
+    return h1 is None or h1 != h2
+
+
+def append_improvements(root: Path, entries: list[tuple[str, str]]) -> Path | None:
+    """Append ``(title, text)`` sections to improvements.md in one buffered write."""
+    entries = [(title, text) for title, text in entries if text]
+    if not entries:
         return None
     imp = root / "projects" / "Self-Improve" / "improvements.md"
     imp.parent.mkdir(parents=True, exist_ok=True)
     ts = time.strftime("%Y-%m-%d %H:%M:%S")
     try:
-        with open(imp, "a", encoding="utf-8") as f:
-            f.write(f"\n\n## {title} ({ts})\n\n")
-            f.write(text + "\n")
+        with open(imp, "a", encoding="utf-8", buffering=1 << 16) as f:
+            f.write("".join(f"\n\n## {title} ({ts})\n\n{text}\n" for title, text in entries))
         return imp
     except Exception:
         return None
@@ -29,7 +53,7 @@ def write_report(root: Path, report: dict) -> Path:
     out_dir.mkdir(parents=True, exist_ok=True)
     ts = time.strftime("%Y%m%d_%H%M%S")
     out_path = out_dir / f"ocr_commit_test_{ts}.json"
-    out_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    out_path.write_bytes(dumps(report, indent=True))
     return out_path
 
 
@@ -38,7 +62,7 @@ def main():
     rules_path = root / "config" / "policy_rules.json"
     ocr_cfg_path = root / "config" / "ocr.json"
     try:
-        rules = json.loads(rules_path.read_text(encoding="utf-8"))
+        rules = load_cfg(rules_path)
     except Exception:
         rules = {}
     vs_cfg = rules.get("vsbridge", {}) or {}
@@ -52,15 +76,24 @@ def main():
     except Exception:
         get_controls_state = None  # type: ignore
     if get_controls_state is not None:
+        # Controller may consult the gate per input event; re-read the shared
+        # state file at most every 100 ms.
+        _gate_cache = [float("-inf"), True]
+
         def _controls_gate() -> bool:
+            now = time.monotonic()
+            if now - _gate_cache[0] < 0.1:
+                return _gate_cache[1]
             try:
                 st = get_controls_state(root) or {}
                 owner = str(st.get("owner", "") or "")
                 # Allow when no owner or when running under workflow_test; yield
                 # when another independent workflow owns controls.
-                return (not owner) or (owner == "workflow_test")
+                ok = (not owner) or (owner == "workflow_test")
             except Exception:
-                return True
+                ok = True
+            _gate_cache[:] = [now, ok]
+            return ok
         ctrl.set_window_gate(_controls_gate)
     try:
         kb_cfg = rules.get("keyboard", {}) or {}
@@ -75,11 +108,16 @@ def main():
 
     # OCR setup
     try:
-        ocr_cfg = json.loads(ocr_cfg_path.read_text(encoding="utf-8"))
+        ocr_cfg = load_cfg(ocr_cfg_path)
     except Exception:
         ocr_cfg = {"enabled": True}
     ocr_debug = root / "logs" / "ocr"
     ocr = CopilotOCR(ocr_cfg, log=log, debug_dir=ocr_debug)
+    # Identical frames (e.g. the retry after an unchanged pane) reuse the cached
+    # OCR result; ROI changes still go through ``ocr`` itself.
+    capture = ocr
+    if bool(ocr_cfg.get("use_cache", True)):
+        capture = CachedOCR(ocr, cache_path=ocr_debug / "cache.json", max_entries=int(ocr_cfg.get("cache_entries", 200)), tile_rows=int(ocr_cfg.get("tile_rows", 0)))
 
     report = {
         "app": {},
@@ -87,28 +125,29 @@ def main():
         "summary": {},
     }
 
-    # Capture from Copilot app
-    def capture_app():
+    # Capture from Copilot app. Only focus + grab happen here; the returned
+    # callable waits for the analysis submitted to ``pool`` and returns
+    # (entry, improvements note), so the app frame is analysed while capture_chat focuses and settles.
+    def capture_app(pool):
         settle_ms = int((ocr_cfg or {}).get("app_settle_ms", 800))
         ok_focus = vs.focus_copilot_app()
-        time.sleep(max(0, settle_ms) / 1000.0)
+        wait_until_settled(ocr, settle_ms)
         # Guard: if a browser or unrelated window is foreground, skip to avoid wrong evidence
         fg = win.get_foreground()
         skipped_reason = ""
         if fg:
             info = win.get_window_info(fg)
-            title = (info.get("title") or "").lower()
-            cls = (info.get("class") or "").lower()
-            is_browser = ("edge" in title) or ("chrome" in title) or ("github" in title)
-            is_vscode = ("visual studio code" in title) or (" - visual studio code" in title)
-            is_copilot_title = ("copilot" in title)
+            kind = classify_window(info.get("title") or "")
+            is_browser = bool(kind & (WindowKind.BROWSER | WindowKind.GITHUB))
+            is_vscode = bool(kind & WindowKind.VSCODE)
+            is_copilot_title = bool(kind & WindowKind.COPILOT)
             if is_browser and not is_copilot_title:
                 skipped_reason = f"foreground looks like browser: title='{info.get('title','')}', class='{info.get('class','')}'"
             if is_vscode:
                 # If VS Code is foreground, prefer the chat path rather than app
                 skipped_reason = skipped_reason or "foreground is VS Code; using chat capture for app text would be misleading"
         if skipped_reason:
-            return {
+            skipped = {
                 "focused": bool(ok_focus),
                 "ok": False,
                 "chars": 0,
@@ -118,6 +157,7 @@ def main():
                 "skipped": True,
                 "reason": skipped_reason,
             }
+            return lambda: (skipped, "")
         # Apply app ROI override if present
         alt_region = None
         orig_region = None
@@ -129,56 +169,72 @@ def main():
         except Exception:
             pass
         try:
-            res = ocr.capture_chat_text(save_dir=ocr_debug)
+            raw, err = ocr.capture_raw()
         finally:
             try:
                 if alt_region and orig_region is not None:
                     setattr(ocr, "region_percent", orig_region)
             except Exception:
                 pass
-        # No OCR text available; instead summarize detected elements and attach image
-        text = ""
-        elems = res.get("elements") if isinstance(res, dict) else None
-        # Fallback: do one more capture if no elements found
-        if not elems:
-            try:
-                time.sleep(max(0, settle_ms + 700) / 1000.0)
-            except Exception:
-                pass
-            try:
-                if alt_region and orig_region is not None:
-                    setattr(ocr, "region_percent", orig_region)
-                res2 = ocr.capture_chat_text(save_dir=ocr_debug)
-                if res2.get("ok") and (res2.get("elements") or []):
-                    elems = res2.get("elements")
-                    res = res2
-            except Exception:
-                pass
-        path = None
-        if elems:
-            note = f"Captured {len(elems)} UI elements. See image: {str(res.get('image_path') or '')}"
-            path = append_improvements(root, "Copilot App Summary (image)", note)
-        return {
-            "focused": bool(ok_focus),
-            "ok": bool(res.get("ok")),
-            "chars": len(text),
-            "preview": text[:200],
-            "image_path": str(res.get("image_path") or ""),
-            "appended_path": str(path) if path else "",
-        }
+        pending = pool.submit(capture.analyze_capture, raw, ocr_debug, "copilot_chat") if raw is not None else None
 
-    # Capture from VS Code chat
+        def finish():
+            if pending is not None:
+                res = pending.result()
+            else:
+                res = {"ok": False, "text": "", "error": err, "image_path": None, "elements": []}
+            # No OCR text available; instead summarize detected elements and attach image
+            text = ""
+            elems = res.get("elements") if isinstance(res, dict) else None
+            # Fallback: do one more capture if no elements found. The chat capture
+            # has taken focus meanwhile, so bring the app back first.
+            retry = not elems
+            if retry:
+                vs.focus_copilot_app()
+                wait_until_settled(ocr, settle_ms)
+            # When the ROI we just captured is not redrawing, the retry would only
+            # repeat this result.
+            if retry:
+                retry = _frame_changing(ocr, region=alt_region if (alt_region and orig_region is not None) else None)
+            if retry:
+                try:
+                    time.sleep(max(0, settle_ms + 700) / 1000.0)
+                except Exception:
+                    pass
+                try:
+                    res2 = capture.capture_chat_text(save_dir=ocr_debug)
+                    if res2.get("ok") and (res2.get("elements") or []):
+                        elems = res2.get("elements")
+                        res = res2
+                except Exception:
+                    pass
+            note = ""
+            if elems:
+                note = f"Captured {len(elems)} UI elements. See image: {str(res.get('image_path') or '')}"
+            return {
+                "focused": bool(ok_focus),
+                "ok": bool(res.get("ok")),
+                "chars": len(text),
+                "preview": text[:200],
+                "image_path": str(res.get("image_path") or ""),
+                "appended_path": "",
+            }, note
+
+        return finish
+
+    # Capture from VS Code chat; returns (entry, improvements note)
     def capture_chat():
         ok_focus = vs.focus_copilot_chat_view()
+        if isinstance(capture, CachedOCR):
+            capture.reset_tiles()
         settle_ms = int((ocr_cfg or {}).get("chat_settle_ms", 1000))
-        time.sleep(max(0, settle_ms) / 1000.0)
+        wait_until_settled(ocr, settle_ms)
         # Guard: ensure VS Code is actually foreground; if not, try to refocus and skip if still wrong
         skipped_reason = ""
         fg = win.get_foreground()
         if fg:
             info = win.get_window_info(fg)
-            title = (info.get("title") or "").lower()
-            is_vscode = ("visual studio code" in title) or (" - visual studio code" in title)
+            is_vscode = bool(classify_window(info.get("title") or "") & WindowKind.VSCODE)
             if not is_vscode:
                 # best-effort refocus
                 try:
@@ -187,8 +243,7 @@ def main():
                     fg2 = win.get_foreground()
                     if fg2:
                         info2 = win.get_window_info(fg2)
-                        title2 = (info2.get("title") or "").lower()
-                        is_vscode = ("visual studio code" in title2) or (" - visual studio code" in title2)
+                        is_vscode = bool(classify_window(info2.get("title") or "") & WindowKind.VSCODE)
                 except Exception:
                     pass
                 if not is_vscode:
@@ -203,7 +258,7 @@ def main():
         except Exception:
             pass
         try:
-            res = ocr.capture_chat_text(save_dir=ocr_debug)
+            res = capture.capture_chat_text(save_dir=ocr_debug)
         finally:
             try:
                 if alt_region and orig_region is not None:
@@ -212,7 +267,12 @@ def main():
                 pass
         text = ""
         elems = res.get("elements") if isinstance(res, dict) else None
-        if not elems:
+        # When the ROI we just captured is not redrawing, the retry would only
+        # repeat this result.
+        retry = not elems
+        if retry:
+            retry = _frame_changing(ocr, region=alt_region if (alt_region and orig_region is not None) else None)
+        if retry:
             try:
                 time.sleep(max(0, settle_ms + 700) / 1000.0)
             except Exception:
@@ -220,29 +280,41 @@ def main():
             try:
                 if alt_region and orig_region is not None:
                     setattr(ocr, "region_percent", orig_region)
-                res2 = ocr.capture_chat_text(save_dir=ocr_debug)
+                res2 = capture.capture_chat_text(save_dir=ocr_debug)
                 if res2.get("ok") and (res2.get("elements") or []):
                     elems = res2.get("elements")
                     res = res2
             except Exception:
                 pass
-        path = None
+        note = ""
         if elems:
             note = f"Captured {len(elems)} UI elements. See image: {str(res.get('image_path') or '')}"
-            path = append_improvements(root, "Copilot Chat Summary (image)", note)
         return {
             "focused": bool(ok_focus),
             "ok": bool(res.get("ok")),
             "chars": len(text),
             "preview": text[:200],
             "image_path": str(res.get("image_path") or ""),
-            "appended_path": str(path) if path else "",
+            "appended_path": "",
             "skipped": bool(skipped_reason),
             "reason": skipped_reason,
-        }
+        }, note
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        finish_app = capture_app(pool)
+        chat_info, chat_note = capture_chat()
+        app_info, app_note = finish_app()
 
-    app_info = capture_app()
-    chat_info = capture_chat()
+    # Both summaries go to improvements.md in one write, app first.
+    imp = append_improvements(root, [
+        ("Copilot App Summary (image)", app_note),
+        ("Copilot Chat Summary (image)", chat_note),
+    ])
+    if imp is not None:
+        if app_note:
+            app_info["appended_path"] = str(imp)
+        if chat_note:
+            chat_info["appended_path"] = str(imp)
 
     report["app"] = app_info
     report["chat"] = chat_info
@@ -255,7 +327,9 @@ def main():
 
     outp = write_report(root, report)
     print("OCR commit test report:", outp)
-    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.stdout.flush()
+    sys.stdout.buffer.write(dumps(report, indent=True, newline=True))
+    sys.stdout.flush()
     return 0
 
 
@@ -1,23 +1,42 @@
 from __future__ import annotations
-import json
+import re
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
 
 from src.control import Controller, SafetyLimits
 from src.vsbridge import VSBridge
 from src.windows import WindowsManager
-from src.ocr import CopilotOCR
+from src.win_classify import WindowKind, classify_window
+from src.ocr import CachedOCR, CopilotOCR, wait_until_settled
+from src.cfg_cache import load_cfg
+from src.image_size import image_size
+from src.text_stats import alpha_count
 from ocr_guard import InputGuard, OCREngine
 import os
 
+import numpy as np
+
 _cv2 = None
 try:
     import cv2  # type: ignore
     _cv2 = cv2
+    _cv2.setUseOptimized(True)
+    _cv2.setNumThreads(os.cpu_count() or 1)
 except Exception:
     _cv2 = None
 
+# Optional coarse-to-fine matching (measurement.coarse_pass, off by default):
+# locate the template on 1/_PYRAMID_SCALE images, then score only a window of
+# _REFINE_PAD pixels around that spot at full resolution. Thin or
+# fine-detailed templates blur away when downsampled, so the coarse spot can be
+# wrong and a real match missed. Templates whose short side is below
+# _PYRAMID_MIN_SIDE always take the full-resolution path.
+_PYRAMID_SCALE = 4
+_PYRAMID_MIN_SIDE = 32
+_REFINE_PAD = 8
+
 
 PALETTE_HINTS = ["open view:", "view:", "command palette", "focus on chat view", "copilot: open chat", "git:"]
 CHAT_READY_HINTS = ["ask copilot", "type your message", "send a message", "reply"]
@@ -32,29 +51,80 @@ NAV_RULES = [
 ]
 
 
+_PALETTE, _READY = "palette", "ready"
+_HINTS = [(h, _PALETTE) for h in PALETTE_HINTS] + [(h, _READY) for h in CHAT_READY_HINTS]
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+if ahocorasick is not None:
+    _AUTOMATON = ahocorasick.Automaton()
+    for _h, _tag in _HINTS:
+        _AUTOMATON.add_word(_h, _tag)
+    _AUTOMATON.make_automaton()
+
+    def _hint_tags(t: str) -> set:
+        return {tag for _, tag in _AUTOMATON.iter(t)}
+else:
+    _HINT_RES = [
+        (tag, re.compile("|".join(re.escape(h) for h, c in _HINTS if c == tag)))
+        for tag in (_PALETTE, _READY)
+    ]
+
+    def _hint_tags(t: str) -> set:
+        return {tag for tag, rx in _HINT_RES if rx.search(t)}
+
+
 def looks_like_palette(text: str) -> bool:
-    t = (text or "").lower()
-    return any(h in t for h in PALETTE_HINTS)
+    return _PALETTE in _hint_tags((text or "").lower())
 
 
 def looks_chat_ready(text: str) -> bool:
     t = (text or "").lower()
-    if any(h in t for h in CHAT_READY_HINTS):
+    tags = _hint_tags(t)
+    if _READY in tags:
         return True
-    alpha = sum(c.isalpha() for c in t)
-    return (alpha > 120) and (not looks_like_palette(t))
+    return (_PALETTE not in tags) and (alpha_count(t) > 120)
 
 
-def template_ready(image_path: str, template_path: str, threshold: float = 0.85) -> bool:
-    if not _cv2:
-        return False
-    if not (image_path and os.path.exists(image_path) and os.path.exists(template_path)):
+@lru_cache(maxsize=8)
+def _load_template(path: str, mtime_ns: int):
+    # mtime_ns is part of the key so an edited template is re-read.
+    tpl = _cv2.imread(path, _cv2.IMREAD_GRAYSCALE)
+    if tpl is None:
+        return None, None
+    small = _cv2.resize(tpl, None, fx=1.0 / _PYRAMID_SCALE, fy=1.0 / _PYRAMID_SCALE, interpolation=_cv2.INTER_AREA)
+    return tpl, small
+
+
+def template_ready(image_path: str, template_path: str, threshold: float = 0.85, coarse: bool = False) -> bool:
+    """Return True if the template matches the capture at ``threshold``.
+
+    ``coarse`` enables the downsampled search, trading possible false
+    negatives for speed.
+    """
+    if not _cv2 or not image_path:
         return False
     try:
+        # os.stat doubles as the template existence check (OSError -> False) and
+        # imread returns None for a missing capture, so no separate exists() calls.
+        tpl, tpl_s = _load_template(template_path, os.stat(template_path).st_mtime_ns)
         img = _cv2.imread(image_path, _cv2.IMREAD_GRAYSCALE)
-        tpl = _cv2.imread(template_path, _cv2.IMREAD_GRAYSCALE)
         if img is None or tpl is None:
             return False
+        th, tw = tpl.shape[:2]
+        if coarse and min(th, tw) >= _PYRAMID_MIN_SIDE and img.shape[0] >= th and img.shape[1] >= tw:
+            s = _PYRAMID_SCALE
+            img_s = _cv2.resize(img, None, fx=1.0 / s, fy=1.0 / s, interpolation=_cv2.INTER_AREA)
+            coarse = _cv2.matchTemplate(img_s, tpl_s, _cv2.TM_CCOEFF_NORMED)
+            _, _, _, (cx, cy) = _cv2.minMaxLoc(coarse)
+            x0 = max(0, cx * s - _REFINE_PAD)
+            y0 = max(0, cy * s - _REFINE_PAD)
+            img = img[y0:y0 + th + 2 * _REFINE_PAD, x0:x0 + tw + 2 * _REFINE_PAD]
+            if img.shape[0] < th or img.shape[1] < tw:
+                return False
         res = _cv2.matchTemplate(img, tpl, _cv2.TM_CCOEFF_NORMED)
         _, max_val, _, _ = _cv2.minMaxLoc(res)
         return bool(max_val >= threshold)
@@ -68,30 +138,56 @@ def main() -> int:
     ocr_cfg_path = root / "config" / "ocr.json"
 
     try:
-        rules = json.loads(rules_path.read_text(encoding="utf-8"))
+        rules = load_cfg(rules_path)
     except Exception:
         rules = {}
     vs_cfg = rules.get("vsbridge", {}) or {}
 
     limits = SafetyLimits(max_clicks_per_min=60, max_keys_per_min=180)
     ctrl = Controller(mouse_speed=0.25, limits=limits, mouse_control_seconds=6, mouse_release_seconds=3)
+    # Only act when no other workflow owns controls.
+    try:
+        from src.control_state import get_controls_state  # type: ignore
+    except Exception:
+        get_controls_state = None  # type: ignore
+    if get_controls_state is not None:
+        # Controller may consult the gate per input event; re-read the shared
+        # state file at most every 100 ms.
+        _gate_cache = [float("-inf"), True]
+
+        def _controls_gate() -> bool:
+            now = time.monotonic()
+            if now - _gate_cache[0] < 0.1:
+                return _gate_cache[1]
+            try:
+                st = get_controls_state(root) or {}
+                owner = str(st.get("owner", "") or "")
+                ok = not owner
+            except Exception:
+                ok = True
+            _gate_cache[:] = [now, ok]
+            return ok
+        ctrl.set_window_gate(_controls_gate)
     win = WindowsManager()
     log = lambda m: None
     vs = VSBridge(ctrl, log, winman=win, delay_ms=int(vs_cfg.get("delay_ms", 300)), dry_run=True)
 
     try:
-        ocr_cfg = json.loads(ocr_cfg_path.read_text(encoding="utf-8"))
+        ocr_cfg = load_cfg(ocr_cfg_path)
     except Exception:
         ocr_cfg = {"enabled": True}
     ocr_debug = root / "logs" / "ocr"
     ocr = CopilotOCR(ocr_cfg, log=lambda m: None, debug_dir=ocr_debug)
+    capture = ocr
+    if bool(ocr_cfg.get("use_cache", True)):
+        capture = CachedOCR(ocr, cache_path=ocr_debug / "cache.json", max_entries=int(ocr_cfg.get("cache_entries", 200)), tile_rows=int(ocr_cfg.get("tile_rows", 0)))
 
     # Ensure VS Code is front and chat view focused
     vs.focus_vscode_window()
     time.sleep(0.35)
     vs.focus_copilot_chat_view()
     settle_ms = int((ocr_cfg or {}).get("chat_settle_ms", 1000))
-    time.sleep(max(0, settle_ms) / 1000.0)
+    wait_until_settled(ocr, settle_ms)
 
     # Prefer VS Code chat target ROI if present
     alt_region = (ocr_cfg.get("targets") or {}).get("vscode_chat") if isinstance(ocr_cfg, dict) else None
@@ -102,52 +198,32 @@ def main() -> int:
         # Require pre-check via element/image capture
         guard = InputGuard(OCREngine(), root / "logs" / "events.jsonl")
         guard.require_observe("chat_pre_observe")
-        res = ocr.capture_chat_text(save_dir=ocr_debug)
+        res = capture.capture_chat_text(save_dir=ocr_debug)
         elems = (res.get("elements") or []) if isinstance(res, dict) else []
         img_path = str(res.get("image_path") or "")
         template_path = str(root / "config" / "chat_input_template.png")
         # Heuristics: ready if template matches or a bottom input-like element present
-        ready = template_ready(img_path, template_path) if img_path else False
-        try:
-            if elems and not ready:
-                from PIL import Image
-        # Only act when no other workflow owns controls.
-        try:
-            from src.control_state import get_controls_state  # type: ignore
-        except Exception:
-            get_controls_state = None  # type: ignore
-        if get_controls_state is not None:
-            def _controls_gate() -> bool:
-                try:
-                    st = get_controls_state(root) or {}
-                    owner = str(st.get("owner", "") or "")
-                    return not owner
-                except Exception:
-                    return True
-            ctrl.set_window_gate(_controls_gate)
-                im = Image.open(img_path)
-                w_img, h_img = im.size
-                for e in elems:
-                    b = e.get("bbox") or {}
-                    if (b.get("height") or 0) < 80 and (b.get("top") or 0) > (0.65 * h_img):
-                        ready = True
-                        break
-        except Exception:
-            pass
-        # Detect palette by finding large overlay elements
+        coarse_pass = bool((rules.get("measurement") or {}).get("coarse_pass", False))
+        ready = template_ready(img_path, template_path, coarse=coarse_pass) if img_path else False
+        # A short element in the bottom band counts as the input box (ready), a
+        # large overlay counts as an open palette. Bboxes are gathered once into
+        # (top, height, width) columns and both rules are array reductions.
         palette = False
         try:
-            if elems:
-                from PIL import Image
-                im = Image.open(img_path)
-                w_img, h_img = im.size
-                area = float(w_img * h_img)
-                for e in elems:
-                    b = e.get("bbox") or {}
-                    a = float((b.get("width") or 0) * (b.get("height") or 0))
-                    if a > 0.3 * area:
-                        palette = True
-                        break
+            size = image_size(img_path) if elems else None
+            if size:
+                w_img, h_img = size
+                boxes = np.array(
+                    [
+                        ((b.get("top") or 0), (b.get("height") or 0), (b.get("width") or 0))
+                        for b in ((e.get("bbox") or {}) for e in elems)
+                    ],
+                    dtype=np.float64,
+                )
+                top, height, width = boxes[:, 0], boxes[:, 1], boxes[:, 2]
+                if not ready:
+                    ready = bool(np.any((height < 80) & (top > 0.65 * h_img)))
+                palette = bool(np.any(width * height > 0.3 * float(w_img * h_img)))
         except Exception:
             pass
 
@@ -160,7 +236,7 @@ def main() -> int:
         if fg:
             info = win.get_window_info(fg)
             fg_title = (info.get("title") or "").lower()
-        if "visual studio code" not in fg_title:
+        if not classify_window(fg_title) & WindowKind.VSCODE:
             reason = "refocus_vscode_before_any_action"
         elif palette:
             reason = "palette_open_close_then_observe"
@@ -1,30 +1,89 @@
+import atexit
 import time
 import json
 from pathlib import Path
+from typing import Callable, Optional
+
+from src.image_size import image_size
+from src.ocr_geom import W, H, element_bboxes
 
 
 class OCREngine:
-    def __init__(self, observe_timeout_ms: int = 2000):
+    """Observation source for InputGuard.
+
+    ``fingerprint`` is an optional cheap frame hash (e.g.
+    ``lambda: frame_digest(copilot_ocr)``). When given, back-to-back guard
+    phases that see the same frame within ``observe_timeout_ms`` reuse one
+    OCR pass instead of re-running it.
+    """
+
+    def __init__(self, observe_timeout_ms: int = 2000, fingerprint: Optional[Callable[[], Optional[bytes]]] = None):
         self.observe_timeout_ms = observe_timeout_ms
+        self.fingerprint = fingerprint
+        self._last: tuple[bytes, dict, float] | None = None
 
     def observe(self, tag: str) -> dict | None:
+        fp = self.fingerprint() if self.fingerprint is not None else None
+        last = self._last
+        if (
+            fp is not None
+            and last is not None
+            and last[0] == fp
+            and (time.monotonic() - last[2]) * 1000.0 <= self.observe_timeout_ms
+        ):
+            return dict(last[1], tag=tag)
+        obs = self._observe_frame(tag)
+        self._last = (fp, obs, time.monotonic()) if (fp is not None and obs) else None
+        return obs
+
+    def _observe_frame(self, tag: str) -> dict | None:
         # Placeholder: integrate real OCR here
         # Return a dict containing text and cursor hints when successful
         return {"tag": tag, "text": "", "cursor": "unknown"}
 
 
 class InputGuard:
+    # The log file stays open and block-buffered; it is flushed every
+    # FLUSH_EVERY events, immediately for events other tools react to, on
+    # close() and at interpreter exit.
+    FLUSH_EVERY = 64
+    FLUSH_EVENTS = frozenset({"ocr_observe_failed", "text_input_wrong_field"})
+
     def __init__(self, ocr: OCREngine, log_path: Path):
         self.ocr = ocr
         self.log_path = log_path
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = None
+        self._pending = 0
+
+    def __enter__(self) -> "InputGuard":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        if self._fh is not None and not self._fh.closed:
+            self._fh.close()
 
     def _log(self, event: str, meta: dict | None = None):
         entry = {"ts": time.time(), "event": event}
         if meta:
             entry.update(meta)
-        with self.log_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(entry) + "\n")
+        if self._fh is None or self._fh.closed:
+            self._fh = self.log_path.open("a", encoding="utf-8", buffering=64 * 1024)
+            atexit.register(self.close)
+        self._fh.write(json.dumps(entry) + "\n")
+        self._pending += 1
+        if event in self.FLUSH_EVENTS or self._pending >= self.FLUSH_EVERY:
+            self._fh.flush()
+            self._pending = 0
 
     def require_observe(self, phase: str) -> dict | None:
         obs = self.ocr.observe(f"pre_{phase}")
@@ -42,16 +101,11 @@ class InputGuard:
                 # If a large element exists, assume palette/overlay
                 try:
                     imgp = obs.get("image_path") or ""
-                    if imgp:
-                        from PIL import Image
-                        im = Image.open(imgp)
-                        w, h = im.size
-                        area = float(w * h)
-                        for e in elems:
-                            b = e.get("bbox") or {}
-                            a = float((b.get("width") or 0) * (b.get("height") or 0))
-                            if a > 0.25 * area:
-                                return True
+                    size = obs.get("image_size") or (image_size(str(imgp)) if imgp else None)
+                    if size:
+                        w, h = size
+                        bb = element_bboxes(obs)
+                        return bool((bb[:, W] * bb[:, H] > 0.25 * float(w * h)).any())
                 except Exception:
                     return False
         except Exception:
@@ -1,16 +1,25 @@
 from __future__ import annotations
 import argparse
+import atexit
 import json
+import re
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
 
 from src.control import Controller, SafetyLimits
 from src.vsbridge import VSBridge
 from src.windows import WindowsManager
-from src.ocr import CopilotOCR
+from src.win_classify import WindowKind, classify_window
+from src.ocr import CopilotOCR, raw_digest
+from src.image_size import image_size
+from src.ocr_geom import classify_bboxes, element_bboxes
+from src.text_stats import alpha_count
 import os
 
+import numpy as np
+
 _cv2 = None
 try:
     import cv2  # type: ignore
@@ -24,7 +33,7 @@ CHAT_READY_HINTS = ["ask copilot", "type your message", "send a message"]
 
 # Common-sense navigation rules, consulted on every observed image.
 # These are intentionally general, not exact-match heuristics.
-NAV_RULES = [
+NAV_RULES = (
     "Intent fidelity: only act toward the stated target; don't open anything else.",
     "Palette hygiene: if command palette/search overlays are present, press ESC and re-observe.",
     "Foreground gating: only act when VS Code is focused in agent mode.",
@@ -33,45 +42,203 @@ NAV_RULES = [
     "No external apps: never launch or interact with browsers; close if foreground.",
     "Idempotence: prefer safe, repeatable actions and verify after acting.",
     "Improve: after the run, assess error events and failed commands; record a lesson and update guards to avoid repeating the error."
-]
+)
+
+
+_PALETTE, _READY = "palette", "ready"
+_HINTS = [(h, _PALETTE) for h in PALETTE_HINTS] + [(h, _READY) for h in CHAT_READY_HINTS]
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+if ahocorasick is not None:
+    _AUTOMATON = ahocorasick.Automaton()
+    for _h, _tag in _HINTS:
+        _AUTOMATON.add_word(_h, _tag)
+    _AUTOMATON.make_automaton()
+
+    def _hint_tags(t: str) -> set:
+        return {tag for _, tag in _AUTOMATON.iter(t)}
+else:
+    _HINT_RES = [
+        (tag, re.compile("|".join(re.escape(h) for h, c in _HINTS if c == tag)))
+        for tag in (_PALETTE, _READY)
+    ]
+
+    def _hint_tags(t: str) -> set:
+        return {tag for tag, rx in _HINT_RES if rx.search(t)}
+
+
+def _text_signals(t: str) -> tuple[bool, bool]:
+    """(palette, chat ready) for already-lowercased OCR text, from one hint scan."""
+    tags = _hint_tags(t)
+    palette = _PALETTE in tags
+    # heuristic: enough words and no palette hints
+    return palette, (_READY in tags) or (not palette and alpha_count(t) > 120)
 
 
 def looks_like_palette(text: str) -> bool:
-    t = text.lower()
-    return any(h in t for h in PALETTE_HINTS)
+    return _PALETTE in _hint_tags((text or "").lower())
+
+
+# BROWSER_HINTS expressed as window kinds; classify_window memoizes per title.
+_BROWSER_KINDS = WindowKind.EDGE | WindowKind.CHROME | WindowKind.GITHUB
 
 
 def looks_like_browser_window(title: str) -> bool:
-    t = title.lower()
-    return any(h in t for h in BROWSER_HINTS) and ("copilot" not in t)
+    kind = classify_window(title)
+    return bool(kind & _BROWSER_KINDS) and not kind & WindowKind.COPILOT
 
 
 def looks_chat_ready(text: str) -> bool:
-    t = (text or "").lower()
-    if any(h in t for h in CHAT_READY_HINTS):
-        return True
-    # heuristic: enough words and no palette hints
-    words = sum(c.isalpha() for c in t)
-    return (words > 120) and (not looks_like_palette(t))
+    return _text_signals((text or "").lower())[1]
+
+
+# The chat input sits in the lower part of the window; callers may pass this
+# normalized (x0, y0, x1, y1) region to try a crop first (a miss there falls
+# back to the whole frame). The optional 1/2-scale pass (measurement.coarse_pass,
+# off by default) rejects frames scoring more than _COARSE_MARGIN below the
+# threshold before the full-resolution correlation runs; halving can push a
+# thin or fine-detailed template's true match below that, so it may miss.
+# Templates whose short side is below _COARSE_MIN_SIDE skip the coarse pass.
+_CHAT_ROI = (0.0, 0.6, 1.0, 1.0)
+_COARSE_MARGIN = 0.1
+_COARSE_MIN_SIDE = 16
+
+
+def _half(img):
+    return _cv2.resize(img, None, fx=0.5, fy=0.5, interpolation=_cv2.INTER_AREA)
+
+
+@lru_cache(maxsize=16)
+def _load_template(path: str, mtime_ns: int):
+    # mtime_ns is part of the key so an edited template is re-read.
+    tpl = _cv2.imread(path, _cv2.IMREAD_GRAYSCALE)
+    if tpl is None or min(tpl.shape[:2]) < _COARSE_MIN_SIDE:
+        return tpl, None
+    return tpl, _half(tpl)
+
+
+# Single-slot cache for the current capture: its decoded grayscale image, the
+# ROI crops taken from it and the match scores per (template, roi), so several
+# templates and thresholds checked against one frame decode it and correlate
+# each template only once.
+_frame_cache: dict = {"path": None, "img": None, "crops": {}, "scores": {}}
+
+
+# matchTemplate output buffers keyed by (image shape, template shape): frames
+# and templates keep their sizes across ticks, so each correlation writes into
+# the same float32 array instead of allocating a new one.
+_result_bufs: dict = {}
+
+
+def _max_score(img, tpl):
+    ih, iw = img.shape[:2]
+    th, tw = tpl.shape[:2]
+    if ih < th or iw < tw:
+        return None
+    key = (ih, iw, th, tw)
+    buf = _result_bufs.get(key)
+    if buf is None:
+        if len(_result_bufs) >= 32:
+            _result_bufs.clear()
+        buf = _result_bufs[key] = np.empty((ih - th + 1, iw - tw + 1), dtype=np.float32)
+    res = _cv2.matchTemplate(img, tpl, _cv2.TM_CCOEFF_NORMED, result=buf)
+    return _cv2.minMaxLoc(res)[1]
+
+
+def _frame_region(roi, tpl) -> list:
+    """Return the cached ``[crop, half_scale_crop_or_None]`` for ``roi`` (None: whole frame)."""
+    crops = _frame_cache["crops"]
+    img = _frame_cache["img"]
+    if roi is None:
+        return crops.setdefault(None, [img, None])
+    if roi not in crops:
+        h, w = img.shape[:2]
+        x0, y0, x1, y1 = roi
+        crops[roi] = [img[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)], None]
+    region = crops[roi]
+    if region[0].shape[0] < tpl.shape[0] or region[0].shape[1] < tpl.shape[1]:
+        # Template taller/wider than the region: the ROI guess does not fit
+        # this capture, so match against the whole frame instead.
+        region = crops.setdefault(None, [img, None])
+    return region
+
+
+def _region_matches(roi, template_path: str, tpl, tpl_half, threshold: float, coarse: bool) -> bool:
+    region = _frame_region(roi, tpl)
+    # Key scores by the region actually used, so a crop that fell back to the
+    # whole frame shares the whole-frame scores.
+    key = (template_path, None if region is _frame_cache["crops"].get(None) else roi)
+    scores = _frame_cache["scores"].setdefault(key, {})
+    if coarse and tpl_half is not None:
+        if "coarse" not in scores:
+            if region[1] is None:
+                region[1] = _half(region[0])
+            scores["coarse"] = _max_score(region[1], tpl_half)
+        low = scores["coarse"]
+        if low is not None and low < threshold - _COARSE_MARGIN:
+            return False
+    if "full" not in scores:
+        scores["full"] = _max_score(region[0], tpl)
+    full = scores["full"]
+    return bool(full is not None and full >= threshold)
 
 
-def template_ready(image_path: str, template_path: str, threshold: float = 0.85) -> bool:
-    if not _cv2:
-        return False
-    if not (image_path and os.path.exists(image_path) and os.path.exists(template_path)):
+def template_ready(image_path: str, template_path: str, threshold: float = 0.85,
+                   roi: tuple | None = None, coarse: bool = False) -> bool:
+    """Return True if the template matches the capture at ``threshold``.
+
+    ``roi`` (normalized ``(x0, y0, x1, y1)``) is tried first when given; if it
+    does not match, the whole frame is checked too, so a crop never turns a
+    match into a miss. ``coarse`` enables the half-scale early reject, trading
+    possible false negatives for speed.
+    """
+    if not _cv2 or not image_path:
         return False
     try:
-        img = _cv2.imread(image_path, _cv2.IMREAD_GRAYSCALE)
-        tpl = _cv2.imread(template_path, _cv2.IMREAD_GRAYSCALE)
-        if img is None or tpl is None:
+        if _frame_cache["path"] != image_path:
+            img = _cv2.imread(image_path, _cv2.IMREAD_GRAYSCALE)
+            _frame_cache.update(path=image_path, img=img, crops={}, scores={})
+        if _frame_cache["img"] is None:
+            return False
+        tpl, tpl_half = _load_template(template_path, os.stat(template_path).st_mtime_ns)
+        if tpl is None:
             return False
-        res = _cv2.matchTemplate(img, tpl, _cv2.TM_CCOEFF_NORMED)
-        _min_val, max_val, _min_loc, _max_loc = _cv2.minMaxLoc(res)
-        return bool(max_val >= threshold)
+        if _region_matches(roi, template_path, tpl, tpl_half, threshold, coarse):
+            return True
+        return roi is not None and _region_matches(None, template_path, tpl, tpl_half, threshold, coarse)
     except Exception:
         return False
 
 
+def match_any_template(image_path: str, tpl_paths: list, threshold: float = 0.85,
+                       roi: tuple | None = None, coarse: bool = False) -> bool:
+    """True if any template in ``tpl_paths`` matches the capture at ``threshold``.
+
+    Templates are tried smallest first: with templates much smaller than the
+    frame, correlation cost grows with template area, so cheap checks run
+    before expensive ones and the loop stops at the first match. Each one goes
+    through ``template_ready`` and so shares its frame, crop and score caches.
+    """
+    if not _cv2 or not image_path:
+        return False
+
+    def area(tpath: str) -> float:
+        try:
+            tpl = _load_template(tpath, os.stat(tpath).st_mtime_ns)[0]
+            return float(tpl.size) if tpl is not None else float("inf")
+        except OSError:
+            return float("inf")
+
+    return any(
+        template_ready(image_path, tpath, threshold=threshold, roi=roi, coarse=coarse)
+        for tpath in sorted(tpl_paths, key=area)
+    )
+
+
 def evaluate_navigation_rules(context: dict) -> dict:
     """Evaluate general navigation rules against current observation.
 
@@ -131,6 +298,15 @@ def evaluate_navigation_rules(context: dict) -> dict:
     }
 
 
+_TITLE_ONLY_REASONS = ("foreground_is_browser_close_first", "refocus_vscode_before_any_action")
+
+
+def title_decision(agent_mode: str, fg_title: str) -> dict | None:
+    """Return the rules decision when the foreground title alone settles it, else None."""
+    decision = evaluate_navigation_rules({"agent_mode": agent_mode, "foreground_title": fg_title})
+    return decision if decision.get("reason") in _TITLE_ONLY_REASONS else None
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="OCR-driven observe→react navigator for VS Code Copilot chat")
     ap.add_argument("--ticks", type=int, default=30)
@@ -153,6 +329,7 @@ def main() -> int:
     meas_threshold = float(meas_cfg.get("threshold", 0.85))
     meas_retry = int(meas_cfg.get("retry_attempts", 2))
     meas_backoff_ms = int(meas_cfg.get("backoff_ms", 400))
+    meas_coarse = bool(meas_cfg.get("coarse_pass", False))
 
     # Optional templates configuration (for curated chat-input templates).
     templates_cfg = {}
@@ -191,6 +368,12 @@ def main() -> int:
 
     out = root / "logs" / "tests" / f"ocr_nav_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
     out.parent.mkdir(parents=True, exist_ok=True)
+    # Both logs are opened once for the whole run instead of once per record.
+    out_f = open(out, "a", encoding="utf-8", buffering=64 * 1024)
+    atexit.register(out_f.close)
+    # A tick's records go out in one writelines(); the buffer is pushed to disk
+    # every FLUSH_TICKS ticks so anyone tailing the log lags by at most that.
+    FLUSH_TICKS = 8
 
     sent = False
     # Track repeated palette classifications so we can back off if we keep
@@ -198,6 +381,7 @@ def main() -> int:
     palette_cooldown = 0
     errors_path = root / "logs" / "errors" / "events.jsonl"
     errors_path.parent.mkdir(parents=True, exist_ok=True)
+    err_f = None
     template_path = str(root / "config" / "chat_input_template.png")
     # Fallback list of curated templates, if provided via config/templates.json.
     chat_templates = []
@@ -205,142 +389,172 @@ def main() -> int:
         chat_templates = list((templates_cfg.get("chat_input", {}) or {}).get("templates", []) or [])
     except Exception:
         chat_templates = []
+    # Template candidates are resolved once per run: prefer explicit
+    # config/chat_input_template.png when present, then any curated templates
+    # from config/templates.json.
+    tpl_paths = []
+    if template_path and os.path.exists(template_path):
+        tpl_paths.append(template_path)
+    for rel in chat_templates:
+        p = root / rel
+        if p.exists():
+            tpl_paths.append(str(p))
+    interval_s = max(0.05, args.interval_ms / 1000.0)
+    # While the captured frame stays identical and the tick only observed (or
+    # nudged), the sleep grows 1.5x per tick up to IDLE_MAX_S; any change,
+    # other action or skipped capture resets it to interval_s.
+    IDLE_MAX_S = max(2.0, interval_s)
+    sleep_s = interval_s
+    prev_frame = None
+    # Whether VS Code was in front at the end of the previous tick, and what
+    # that tick did; used to skip a redundant focus call plus its settle delay.
+    prev_fg_was_vscode = False
+    last_action = None
+    # The rules block is identical in every tick record: encode it once and
+    # splice it in after the per-tick fields.
+    rules_suffix = ', "rules_version": 1, "rules": ' + json.dumps(NAV_RULES) + "}\n"
     for i in range(max(1, int(args.ticks))):
+        pending_out: list[str] = []
+        # One clock read per tick, shared by every record the tick writes.
+        now = time.time()
+        top_title = ""
         # Close disallowed browser windows if foreground
         try:
+            # Only the title is needed; get_window_info would also open the
+            # owning process to resolve its image path on every tick.
             fg = win.get_foreground()
             if fg:
-                info = win.get_window_info(fg)
-                title = info.get("title") or ""
+                title = win.get_window_title(fg)
+                top_title = title
                 if looks_like_browser_window(title):
+                    top_title = ""
                     win.close_window(fg)
-                    with open(out, "a", encoding="utf-8") as f:
-                        f.write(json.dumps({"ts": time.time(), "tick": i, "action": "close_foreground", "title": title}) + "\n")
+                    pending_out.append(json.dumps({"ts": now, "tick": i, "action": "close_foreground", "title": title}) + "\n")
                     # also log structured error event
                     try:
-                        with open(errors_path, "a", encoding="utf-8") as ef:
-                            ef.write(json.dumps({
-                                "ts": time.strftime('%Y-%m-%d %H:%M:%S'),
-                                "source": "ocr_observe_react_nav.py",
-                                "type": "browser_foreground_closed",
-                                "message": "Closed disallowed foreground browser",
-                                "data": {"title": title}
-                            }) + "\n")
+                        if err_f is None:
+                            err_f = open(errors_path, "a", encoding="utf-8")
+                            atexit.register(err_f.close)
+                        err_f.write(json.dumps({
+                            # events.jsonl readers (learn_from_run) expect the text form.
+                            "ts": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now)),
+                            "source": "ocr_observe_react_nav.py",
+                            "type": "browser_foreground_closed",
+                            "message": "Closed disallowed foreground browser",
+                            "data": {"title": title}
+                        }) + "\n")
+                        # Other tools scan events.jsonl while we run.
+                        err_f.flush()
                     except Exception:
                         pass
                     time.sleep(0.3)
         except Exception:
             pass
 
-        # Focus VS Code window
-        vs.focus_vscode_window()
-        time.sleep(0.25)
-        # Capture image frame, OCR text, and detect UI elements
-        res = ocr.capture_chat_text(save_dir=ocr_debug)
-        img_path = str(res.get("image_path") or "") if isinstance(res, dict) else ""
-        elems = res.get("elements") if isinstance(res, dict) else None
-        text = str(res.get("text") or "") if isinstance(res, dict) else ""
-
-        # Heuristics combining text and geometry. We separate text and geometry
-        # signals, then combine them conservatively so that a large chat panel
-        # is not mistaken for a palette overlay.
+        # Focus VS Code window, unless it was already in front last tick, still
+        # is, and nothing since (refocus, browser close) has moved focus.
+        still_vscode = (
+            prev_fg_was_vscode
+            and last_action != "refocus_vscode"
+            and "visual studio code" in top_title.lower()
+        )
+        if not still_vscode:
+            vs.focus_vscode_window()
+            time.sleep(0.25)
+
+        # Read and enforce RULES exactly at image observation. After a focus
+        # call the foreground is re-read (not reused from the browser check)
+        # because the focus normally changes it. When the title alone decides the
+        # tick (browser in front, VS Code not focused) the capture, OCR and
+        # template matching are skipped.
+        if still_vscode:
+            fg_title = top_title
+        else:
+            fg = win.get_foreground()
+            fg_title = win.get_window_title(fg) if fg else ""
+        img_path = ""
+        elems = None
+        frame = None
         palette = False
         ready = False
-        palette_text = False
-        ready_text = False
-        palette_geom = False
-        ready_geom = False
-
-        # Text-based hints first
-        if text:
-            palette_text = looks_like_palette(text)
-            ready_text = looks_chat_ready(text)
-
-        # Geometry-based hints as a fallback/refinement
-        try:
-            if img_path and elems:
-                from PIL import Image
-
-                im = Image.open(img_path)
-                w_img, h_img = im.size
-                img_area = float(w_img * h_img)
-                for e in elems:
-                    b = e.get("bbox") or {}
-                    area = float((b.get("width") or 0) * (b.get("height") or 0))
-                    top = float(b.get("top") or 0)
-                    height = float(b.get("height") or 0)
-                    # large overlay near the top suggests palette/command overlay
-                    if area > 0.35 * img_area and top < 0.4 * h_img:
-                        palette_geom = True
-                    # input-like narrow box near bottom indicates readiness
-                    if height < 80 and top > (0.65 * h_img):
-                        ready_geom = True
-        except Exception:
-            pass
-
-        # Template-based readiness: optionally require at least one curated
-        # chat-input match when an image is available. This is conservative
-        # and only strengthens an existing "ready" signal; it does not force
-        # readiness when other signals are weak.
-        if img_path:
+        cooldown_reason = None
+        decision = title_decision(args.agent_mode, fg_title)
+        if decision is None:
+            # Capture image frame, OCR text, and detect UI elements. This is
+            # capture_chat_text split in two so the raw pixels can be fingerprinted.
+            raw, err = ocr.capture_raw()
+            if raw is None:
+                res = {"ok": False, "text": "", "error": err, "image_path": None, "elements": []}
+            else:
+                frame = raw_digest(raw)
+                res = ocr.analyze_capture(raw, save_dir=ocr_debug, tag="copilot_chat")
+            img_path = str(res.get("image_path") or "") if isinstance(res, dict) else ""
+            elems = res.get("elements") if isinstance(res, dict) else None
+            text = str(res.get("text") or "") if isinstance(res, dict) else ""
+
+            # Heuristics combining text and geometry. We separate text and geometry
+            # signals, then combine them conservatively so that a large chat panel
+            # is not mistaken for a palette overlay.
+            palette_text = False
+            ready_text = False
+            palette_geom = False
+            ready_geom = False
+
+            # Text-based hints first
+            if text:
+                palette_text, ready_text = _text_signals(text.lower())
+
+            # Geometry-based hints as a fallback/refinement
             try:
-                # Prefer explicit config/chat_input_template.png when present.
-                tpl_paths = []
-                if template_path and os.path.exists(template_path):
-                    tpl_paths.append(template_path)
-                # Add any curated templates from config/templates.json.
-                for rel in chat_templates:
-                    p = root / rel
-                    if p.exists():
-                        tpl_paths.append(str(p))
-                matched = False
-                for tpath in tpl_paths:
-                    if template_ready(img_path, tpath, threshold=meas_threshold):
-                        matched = True
-                        break
-                if matched:
-                    ready_geom = True
+                # The capture reports its own size; only re-read the saved PNG
+                # header for results that lack it.
+                size = (res.get("image_size") or image_size(img_path)) if (img_path and elems) else None
+                if size:
+                    w_img, h_img = size
+                    # large overlay near the top suggests palette/command overlay;
+                    # input-like narrow box near bottom indicates readiness
+                    palette_geom, ready_geom = classify_bboxes(element_bboxes(res), float(w_img * h_img), h_img)
             except Exception:
                 pass
 
-        # Combine signals:
-        # - Palette from text is strong.
-        # - Palette from geometry only counts when text does NOT already say
-        #   the chat is ready; this avoids treating a normal chat panel as an overlay.
-        palette = bool(palette_text or (palette_geom and not ready_text))
-        ready = bool(ready_text or ready_geom)
-
-        # Also allow template matching for chat input readiness when not already ready
-        if not ready and img_path:
-            ready = template_ready(img_path, template_path)
-
-        # If we repeatedly think "palette" while also believing the chat is
-        # ready, treat it as a likely false positive and back off.
-        cooldown_reason = None
-        if palette and ready and not palette_text:
-            palette_cooldown += 1
-            if palette_cooldown >= 4:
-                palette = False
-                cooldown_reason = "palette_cooldown_override"
-        else:
-            palette_cooldown = 0
-
-        # Read and enforce RULES exactly at image observation
-        fg = win.get_foreground()
-        fg_title = ""
-        try:
-            if fg:
-                info = win.get_window_info(fg)
-                fg_title = info.get("title") or ""
-        except Exception:
-            fg_title = ""
-
-        decision = evaluate_navigation_rules({
-            "agent_mode": args.agent_mode,
-            "foreground_title": fg_title,
-            "palette": palette,
-            "ready": ready,
-        })
+            # Template-based readiness: optionally require at least one curated
+            # chat-input match when an image is available. This is conservative
+            # and only strengthens an existing "ready" signal; it does not force
+            # readiness when other signals are weak.
+            if img_path:
+                try:
+                    if match_any_template(img_path, tpl_paths, threshold=meas_threshold, roi=_CHAT_ROI, coarse=meas_coarse):
+                        ready_geom = True
+                except Exception:
+                    pass
+
+            # Combine signals:
+            # - Palette from text is strong.
+            # - Palette from geometry only counts when text does NOT already say
+            #   the chat is ready; this avoids treating a normal chat panel as an overlay.
+            palette = bool(palette_text or (palette_geom and not ready_text))
+            ready = bool(ready_text or ready_geom)
+
+            # Also allow template matching for chat input readiness when not already ready
+            if not ready and img_path:
+                ready = template_ready(img_path, template_path, roi=_CHAT_ROI, coarse=meas_coarse)
+
+            # If we repeatedly think "palette" while also believing the chat is
+            # ready, treat it as a likely false positive and back off.
+            if palette and ready and not palette_text:
+                palette_cooldown += 1
+                if palette_cooldown >= 4:
+                    palette = False
+                    cooldown_reason = "palette_cooldown_override"
+            else:
+                palette_cooldown = 0
+
+            decision = evaluate_navigation_rules({
+                "agent_mode": args.agent_mode,
+                "foreground_title": fg_title,
+                "palette": palette,
+                "ready": ready,
+            })
 
         # React to image per RULES
         action = None
@@ -360,25 +574,35 @@ def main() -> int:
                 sent = True
                 action = "send_message"
 
-        with open(out, "a", encoding="utf-8") as f:
-            f.write(json.dumps({
-                "ts": time.time(),
-                "tick": i,
-                "palette": palette,
-                "ready": ready,
-                "action": action,
-                "image_path": img_path,
-                "elements_count": len(elems) if elems is not None else 0,
-                "fg_title": fg_title,
-                "palette_cooldown": palette_cooldown,
-                "cooldown_reason": cooldown_reason,
-                "rules_version": 1,
-                "rules_reason": decision.get("reason"),
-                "rules": NAV_RULES
-            }) + "\n")
-
-        time.sleep(max(0.05, args.interval_ms / 1000.0))
+        pending_out.append(json.dumps({
+            "ts": now,
+            "tick": i,
+            "palette": palette,
+            "ready": ready,
+            "action": action,
+            "image_path": img_path,
+            "elements_count": len(elems) if elems is not None else 0,
+            "fg_title": fg_title,
+            "palette_cooldown": palette_cooldown,
+            "cooldown_reason": cooldown_reason,
+            "rules_reason": decision.get("reason"),
+        })[:-1] + rules_suffix)
+        out_f.writelines(pending_out)
+        prev_fg_was_vscode = "visual studio code" in fg_title.lower()
+        last_action = action
+        if i % FLUSH_TICKS == FLUSH_TICKS - 1:
+            out_f.flush()
+
+        if frame is not None and frame == prev_frame and action in (None, "press_esc_nudge"):
+            sleep_s = min(sleep_s * 1.5, IDLE_MAX_S)
+        else:
+            sleep_s = interval_s
+        prev_frame = frame
+        time.sleep(sleep_s)
 
+    out_f.close()
+    if err_f is not None:
+        err_f.close()
     print(f"OCR nav log: {out}")
     return 0
 
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import argparse
 import json
+import re
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from src.control import Controller, SafetyLimits
@@ -10,6 +13,142 @@ from src.vsbridge import VSBridge
 from src.windows import WindowsManager
 from src.ocr import CopilotOCR
 
+# Controls resolved by the UIA searches below, per top-level hwnd, so repeated
+# attempts and tabs in one run do not search the VS Code tree again. Entries are
+# re-validated (still in the tree and on screen) before reuse and dropped when
+# stale, e.g. the input of a chat tab that is no longer the visible one.
+_uia_cache: dict[int, dict] = {}
+
+_NEW_CHAT_NAMES = ("new chat", "new conversation", "start chat")
+_CHAT_INPUT_NAMES = ("message", "chat", "type", "ask")
+# The same needles as single alternations, for the per-control tree scans.
+_NEW_CHAT_RE = re.compile("|".join(map(re.escape, _NEW_CHAT_NAMES)))
+_NEW_CHAT_MENU_RE = re.compile("new chat|new conversation")
+_CHAT_INPUT_RE = re.compile("|".join(map(re.escape, _CHAT_INPUT_NAMES)))
+# UIA PropertyConditionFlags_IgnoreCase | PropertyConditionFlags_MatchSubstring
+_MATCH_SUBSTRING_NOCASE = 1 | 2
+# After a New Chat command VS Code is normally still in front, so a foreground
+# check passes at once; the chat view needs this long to open before the input
+# probes (ESC/TAB + OCR) run against it.
+_NEW_CHAT_SETTLE_S = 0.3
+
+
+def _cached_control(hwnd: int, key: str):
+    ctl = (_uia_cache.get(hwnd) or {}).get(key)
+    if ctl is None:
+        return None
+    try:
+        if ctl.Exists(0, 0) and not ctl.IsOffscreen:
+            return ctl
+    except Exception:
+        pass
+    _uia_cache.get(hwnd, {}).pop(key, None)
+    return None
+
+
+def _find_first(auto, root_ctl, control_types: tuple, names: tuple, allow_empty_name: bool = False):
+    """Single UIA FindFirst over ``root_ctl``'s descendants.
+
+    Matches any of ``control_types`` whose Name contains one of ``names``
+    (case-insensitive), or has no name when ``allow_empty_name``. The whole
+    condition is evaluated inside UIA, so this is one cross-process call instead
+    of a property read per walked control. Returns None when nothing matches or
+    the condition API is unavailable (e.g. substring matching before Windows 10
+    1809); callers then fall back to scanning the tree.
+    """
+    try:
+        uia = auto._AutomationClient.instance().IUIAutomation
+
+        def any_of(conds):
+            out = conds[0]
+            for c in conds[1:]:
+                out = uia.CreateOrCondition(out, c)
+            return out
+
+        type_cond = any_of([uia.CreatePropertyCondition(auto.PropertyId.ControlTypeProperty, t) for t in control_types])
+        name_conds = [uia.CreatePropertyConditionEx(auto.PropertyId.NameProperty, n, _MATCH_SUBSTRING_NOCASE) for n in names]
+        if allow_empty_name:
+            name_conds.append(uia.CreatePropertyCondition(auto.PropertyId.NameProperty, ""))
+        element = root_ctl.Element.FindFirst(auto.TreeScope.Descendants, uia.CreateAndCondition(type_cond, any_of(name_conds)))
+        return auto.Control.CreateControlFromElement(element) if element else None
+    except Exception:
+        return None
+
+
+def _bfs_find(root_ctl, max_depth: int, predicate, max_nodes: int | None = None):
+    """Breadth-first search below ``root_ctl`` for the first control matching ``predicate``.
+
+    The controls we look for (New Chat button, chat input) sit a few levels
+    under the window root, so level order reaches them long before a
+    depth-first walk that first descends into the editor and minimap. Each
+    level costs one GetChildren() call per parent. ``max_nodes`` bounds the
+    number of controls tested. Predicates should return False rather than raise.
+    """
+    queue = deque([(root_ctl, 0)])
+    seen = 0
+    while queue:
+        ctl, depth = queue.popleft()
+        if depth >= max_depth:
+            continue
+        try:
+            children = ctl.GetChildren()
+        except Exception:
+            continue
+        for child in children:
+            seen += 1
+            if max_nodes is not None and seen > max_nodes:
+                return None
+            if predicate(child):
+                return child
+            queue.append((child, depth + 1))
+    return None
+
+
+def _control_fields(ctl, *names: str) -> tuple[str, ...] | None:
+    try:
+        return tuple(str(getattr(ctl, n, "") or "") for n in names)
+    except Exception:
+        return None
+
+
+def _is_new_chat_button(ctl) -> bool:
+    fields = _control_fields(ctl, "ControlTypeName", "Name", "AutomationId")
+    if fields is None or fields[0].lower() not in {"buttoncontrol", "splitbuttoncontrol"}:
+        return False
+    return bool(_NEW_CHAT_RE.search(fields[1].lower()) or _NEW_CHAT_RE.search(fields[2].lower()))
+
+
+def _is_chat_input(ctl) -> bool:
+    fields = _control_fields(ctl, "ControlTypeName", "Name")
+    if fields is None or fields[0].lower() not in {"editcontrol", "documentscontrol", "richtextcontrol", "textcontrol"}:
+        return False
+    nm = fields[1].strip().lower()
+    return not nm or _CHAT_INPUT_RE.search(nm) is not None
+
+
+def _is_new_chat_menu_target(ctl) -> bool:
+    fields = _control_fields(ctl, "ControlTypeName", "Name")
+    if fields is None or fields[0].lower() not in {"buttoncontrol", "splitbuttoncontrol", "menuitemcontrol"}:
+        return False
+    return _NEW_CHAT_MENU_RE.search(fields[1].lower()) is not None
+
+
+def _wait_until(pred, timeout_s: float, poll_s: float = 0.02) -> bool:
+    """Poll ``pred`` until it returns True or ``timeout_s`` elapses; returns its last result.
+
+    Only for cheap, side-effect-free checks (e.g. foreground verification).
+    """
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            if pred():
+                return True
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_s)
+
 
 def _click_new_chat_button(vs: VSBridge) -> bool:
     try:
@@ -30,24 +169,21 @@ def _click_new_chat_button(vs: VSBridge) -> bool:
         except Exception:
             return False
 
-    target = None
-    for ctl, _depth in auto.WalkControl(root_ctl, maxDepth=10):
-        try:
-            ctn = str(getattr(ctl, "ControlTypeName", "") or "").lower()
-            if ctn not in {"buttoncontrol", "splitbuttoncontrol"}:
-                continue
-            nm = str(getattr(ctl, "Name", "") or "").strip().lower()
-            automation_id = str(getattr(ctl, "AutomationId", "") or "").lower()
-        except Exception:
-            continue
-
-        tokens = [nm, automation_id]
-        if any("new chat" in t or "new conversation" in t or "start chat" in t for t in tokens if t):
-            target = ctl
-            break
+    target = _cached_control(int(hwnd), "new_chat_btn")
+    if target is None:
+        target = _find_first(
+            auto,
+            root_ctl,
+            (auto.ControlType.ButtonControl, auto.ControlType.SplitButtonControl),
+            _NEW_CHAT_NAMES,
+        )
+    if target is None:
+        # Tree scan also matches on AutomationId, which the scoped search does not.
+        target = _bfs_find(root_ctl, 10, _is_new_chat_button)
 
     if target is None:
         return False
+    _uia_cache.setdefault(int(hwnd), {})["new_chat_btn"] = target
 
     if vs.dry_run:
         return True
@@ -96,19 +232,19 @@ def _ensure_chat_input_ready(vs: VSBridge, forced_vscode: bool) -> bool:
 
         hwnd = vs.winman.get_foreground() if getattr(vs, "winman", None) else None
         root_ctl = auto.ControlFromHandle(int(hwnd)) if hwnd else auto.GetFocusedControl()
-        target = None
-        for ctl, _depth in auto.WalkControl(root_ctl, maxDepth=12):
-            try:
-                ctn = str(getattr(ctl, "ControlTypeName", "") or "").lower()
-                if ctn not in {"editcontrol", "documentscontrol", "richtextcontrol", "textcontrol"}:
-                    continue
-                nm = str(getattr(ctl, "Name", "") or "").strip().lower()
-            except Exception:
-                continue
-            if nm and not any(k in nm for k in ("message", "chat", "type", "ask")):
-                continue
-            target = ctl
-            break
+        target = _cached_control(int(hwnd), "chat_input") if hwnd else None
+        if target is None:
+            target = _find_first(
+                auto,
+                root_ctl,
+                (auto.ControlType.EditControl, auto.ControlType.TextControl),
+                _CHAT_INPUT_NAMES,
+                allow_empty_name=True,
+            )
+        if target is None:
+            target = _bfs_find(root_ctl, 12, _is_chat_input)
+        if target is not None and hwnd:
+            _uia_cache.setdefault(int(hwnd), {})["chat_input"] = target
         if target is not None:
             if not vs.dry_run:
                 try:
@@ -127,6 +263,11 @@ def _ensure_chat_input_ready(vs: VSBridge, forced_vscode: bool) -> bool:
     return False
 
 
+def _append_entry(path: Path, entry: dict) -> None:
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
 def _root() -> Path:
     return Path(__file__).resolve().parent.parent
 
@@ -207,15 +348,76 @@ def main() -> int:
         "Chat: New Chat",
     ]
 
+    # get_window_info opens the owning process to resolve its image path; a
+    # window's process does not change, so reuse the result per hwnd for 2 s.
+    _info_cache: dict[int, tuple[float, dict]] = {}
+
+    def _cached_window_info(hwnd: int) -> dict:
+        now = time.monotonic()
+        hit = _info_cache.get(hwnd)
+        if hit is not None and now - hit[0] < 2.0:
+            return hit[1]
+        info = win.get_window_info(hwnd)
+        _info_cache[hwnd] = (now, info)
+        return info
+
+    def _is_vscode_info(info: dict) -> bool:
+        proc = str(info.get("process") or "").lower()
+        title = str(info.get("title") or "").lower()
+        return ("code" in proc) or ("visual studio code" in title) or ("vscode" in title)
+
+    # The VS Code top-level window found by the list_windows fallback; kept for
+    # later attempts and tabs while it still looks like VS Code.
+    _vscode_hwnd = [0]
+
+    def _find_vscode_hwnd() -> int:
+        hwnd = _vscode_hwnd[0]
+        if hwnd and _is_vscode_info(_cached_window_info(hwnd)):
+            return hwnd
+        _vscode_hwnd[0] = 0
+        for w in win.list_windows(include_empty_titles=True):
+            hwnd = int(w.get("hwnd") or 0)
+            if hwnd and _is_vscode_info(_cached_window_info(hwnd)):
+                _vscode_hwnd[0] = hwnd
+                break
+        return _vscode_hwnd[0]
+
+    # Track the foreground hwnd from a WinEvent hook instead of polling
+    # GetForegroundWindow in the retry loops; without the hook, fall back to
+    # polling and reuse each answer for 500 ms (it is checked twice
+    # back-to-back per attempt).
+    _fg_hwnd = [0]
+    unsubscribe_fg = win.subscribe_foreground(lambda hwnd: _fg_hwnd.__setitem__(0, hwnd))
+    _fg_hwnd[0] = int(win.get_foreground() or 0)
+
+    def _current_foreground() -> int:
+        if unsubscribe_fg is not None:
+            return _fg_hwnd[0]
+        return int(win.get_foreground() or 0)
+
+    _fg_cache = [float("-inf"), False]
+
     def _foreground_is_vscode() -> bool:
+        now = time.monotonic()
+        if unsubscribe_fg is None and now - _fg_cache[0] < 0.5:
+            return _fg_cache[1]
         try:
-            fg = win.get_foreground()
-            info = win.get_window_info(fg) if fg else {}
-            proc = str(info.get("process") or "").lower()
-            title = str(info.get("title") or "").lower()
-            return ("code" in proc) or ("visual studio code" in title) or ("vscode" in title)
+            fg = _current_foreground()
+            ok = bool(fg) and _is_vscode_info(_cached_window_info(fg))
         except Exception:
-            return False
+            ok = False
+        _fg_cache[0], _fg_cache[1] = now, ok
+        return ok
+
+    out_dir = root / "logs" / "tests"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"open_agent_mode_tabs_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    # Per-tab entries are appended to a JSONL sidecar as they complete, on a
+    # background thread so the file I/O overlaps the next tab's UI work; the
+    # sidecar also keeps finished tabs if the run dies before the summary.
+    entries_path = out_path.with_suffix(".jsonl")
+    pool = ThreadPoolExecutor(max_workers=1)
+    futures = []
 
     results = []
     success_count = 0
@@ -227,21 +429,10 @@ def main() -> int:
             forced_vscode = False
             if not ok_focus:
                 try:
-                    wins = win.list_windows(include_empty_titles=True)
-                    pick_hwnd = 0
-                    for w in wins:
-                        hwnd = int(w.get("hwnd") or 0)
-                        if not hwnd:
-                            continue
-                        info = win.get_window_info(hwnd)
-                        title = str(info.get("title") or "").lower()
-                        proc = str(info.get("process") or "").lower()
-                        if "code" in proc or "visual studio code" in title or "vscode" in title:
-                            pick_hwnd = hwnd
-                            break
+                    pick_hwnd = _find_vscode_hwnd()
                     if pick_hwnd and win.focus_hwnd(pick_hwnd):
                         forced_vscode = True
-                        time.sleep(0.2)
+                        _wait_until(lambda: _current_foreground() == pick_hwnd, 0.2)
                         ok_focus = bool(vs.focus_copilot_chat_view(skip_focus=True))
                 except Exception:
                     pass
@@ -261,7 +452,7 @@ def main() -> int:
                 for cmd in commands:
                     tried.append(cmd)
                     if vs.command_palette(cmd, allow_repeat=True, allow_unverified=forced_vscode):
-                        time.sleep(0.3)
+                        time.sleep(_NEW_CHAT_SETTLE_S)
                         if not vs._verify_vscode_foreground():
                             vs.focus_vscode_window()
                             continue
@@ -276,7 +467,7 @@ def main() -> int:
                                     continue
                                 tried.append(cmd)
                                 if vs.command_palette(cmd, allow_repeat=True, allow_unverified=forced_vscode):
-                                    time.sleep(0.3)
+                                    time.sleep(_NEW_CHAT_SETTLE_S)
                                     if not vs._verify_vscode_foreground():
                                         vs.focus_vscode_window()
                                         continue
@@ -290,27 +481,11 @@ def main() -> int:
                 try:
                     import uiautomation as auto  # type: ignore
 
-                    hwnd = win.get_foreground() if win else None
+                    hwnd = _current_foreground()
                     root_ctl = auto.ControlFromHandle(int(hwnd)) if hwnd else auto.GetFocusedControl()
-                    target = None
-                    scanned = 0
-                    for ctl, _depth in auto.WalkControl(root_ctl, maxDepth=10):
-                        scanned += 1
-                        if scanned > 1800:
-                            break
-                        try:
-                            ctn = str(getattr(ctl, "ControlTypeName", "") or "").lower()
-                            if ctn not in {"buttoncontrol", "splitbuttoncontrol", "menuitemcontrol"}:
-                                continue
-                            nm = str(getattr(ctl, "Name", "") or "").strip()
-                        except Exception:
-                            continue
-                        nm_l = nm.lower()
-                        if "new chat" in nm_l or "new conversation" in nm_l:
-                            target = ctl
-                            fallback_name = nm
-                            break
+                    target = _bfs_find(root_ctl, 10, _is_new_chat_menu_target, max_nodes=1800)
                     if target is not None:
+                        fallback_name = str(getattr(target, "Name", "") or "").strip()
                         if not vs.dry_run:
                             try:
                                 target.Click()
@@ -361,17 +536,23 @@ def main() -> int:
             "success": success,
         }
         results.append(entry)
+        futures.append(pool.submit(_append_entry, entries_path, entry))
         if success:
             success_count += 1
 
-    out_dir = root / "logs" / "tests"
-    out_dir.mkdir(parents=True, exist_ok=True)
+    pool.shutdown(wait=True)
+    if unsubscribe_fg is not None:
+        unsubscribe_fg()
+    for fut in futures:
+        try:
+            fut.result()
+        except Exception:
+            pass
     summary = {
         "requested": max(0, int(args.count)),
         "success_count": success_count,
         "results": results,
     }
-    out_path = out_dir / f"open_agent_mode_tabs_{time.strftime('%Y%m%d_%H%M%S')}.json"
     out_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
     print(str(out_path))
     if success_count < max(0, int(args.count)):
@@ -15,8 +15,15 @@ This will:
 - Allow the root-level vscode_automation orchestrator to keep VS Code
   Agent Mode editor tabs and chats active according to the objectives
   and config/vscode_orchestrator.json.
+
+On POSIX the wrapper replaces itself with src.main (same PID, signals go
+straight to the agent); pass --keep-wrapper to run it as a child instead.
+On Windows it always runs as a child: exec there starts a new process and
+exits the caller immediately, losing the exit code and the PID that
+start_simultaneous_workflow records.
 """
 
+import os
 import subprocess
 import sys
 from pathlib import Path
@@ -33,6 +40,11 @@ def main() -> int:
         "--objectives",
         "config/objectives_orchestrator.md",
     ]
+    if os.name != "nt" and "--keep-wrapper" not in sys.argv[1:]:
+        os.chdir(root)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, cmd)
     return subprocess.call(cmd, cwd=str(root))
 
 
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import argparse
+import atexit
 import json
 import time
 from pathlib import Path
 from typing import Any
 
+from src.json_bytes import dumps
+
 
 def _root() -> Path:
     return Path(__file__).resolve().parent.parent
@@ -32,10 +35,46 @@ def _ts() -> str:
     return time.strftime("%Y-%m-%d %H:%M:%S")
 
 
+class _JsonlWriter:
+    """Append-only JSONL file kept open for the life of the process.
+
+    Records are block-buffered and flushed every ``flush_every`` writes and at
+    interpreter exit, instead of reopening the file per record. Each flush is a
+    single append of whole lines, so other processes appending to the same file
+    never see a record split.
+    """
+
+    def __init__(self, path: Path, flush_every: int = 16):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = max(1, int(flush_every))
+        self._pending = 0
+        self._fh = path.open("ab", buffering=1 << 16)
+        atexit.register(self.close)
+
+    def write(self, obj: dict) -> None:
+        self._fh.write(dumps(obj, newline=True))
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._fh.closed:
+            self._fh.flush()
+        self._pending = 0
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+
+_writers: dict[Path, _JsonlWriter] = {}
+
+
 def _append_jsonl(path: Path, obj: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    w = _writers.get(path)
+    if w is None:
+        w = _writers[path] = _JsonlWriter(path)
+    w.write(obj)
 
 
 def _write_if_missing(path: Path, content: str) -> None:
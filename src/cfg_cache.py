@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson as _json  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    import json as _json
+
+
+@lru_cache(maxsize=32)
+def _load(path: str, mtime_ns: int, size: int) -> Any:
+    return _json.loads(Path(path).read_bytes())
+
+
+def load_cfg(path: Path) -> Any:
+    """Parse a JSON config file, reusing the result while the file is unchanged.
+
+    The cache key includes the file's mtime and size, so edits are picked up on
+    the next call. The returned object is shared between callers: copy it
+    before mutating. Raises ``OSError`` if the file is missing and the JSON
+    decoder's error if it does not parse.
+    """
+    st = path.stat()
+    return _load(str(path), st.st_mtime_ns, st.st_size)
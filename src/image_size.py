@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+import struct
+from functools import lru_cache
+from typing import Optional, Tuple
+
+try:
+    from PIL import Image as _PIL_Image
+except Exception:  # pragma: no cover - optional dependency
+    _PIL_Image = None
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@lru_cache(maxsize=32)
+def _image_size(path: str, mtime_ns: int) -> Optional[Tuple[int, int]]:
+    # mtime_ns is part of the key so a rewritten capture is measured again.
+    with open(path, "rb") as f:
+        head = f.read(24)
+    # PNG: width/height are the first two fields of the IHDR chunk (bytes 16-24).
+    if head[:8] == _PNG_SIGNATURE and head[12:16] == b"IHDR":
+        w, h = struct.unpack(">II", head[16:24])
+        return int(w), int(h)
+    if _PIL_Image is None:
+        return None
+    with _PIL_Image.open(path) as im:
+        return im.size
+
+
+def image_size(path: str) -> Optional[Tuple[int, int]]:
+    """Return ``(width, height)`` of an image file, or None if it cannot be read.
+
+    PNG captures are measured from their 24-byte header without decoding; other
+    formats fall back to Pillow. Results are cached per ``(path, mtime_ns)``.
+    """
+    try:
+        return _image_size(str(path), os.stat(path).st_mtime_ns)
+    except Exception:
+        return None
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+
+# Parse JSON from bytes or str, preferring orjson when it is installed. Bound
+# directly (no wrapper) since it runs per line in log readers; decode errors
+# are ValueError subclasses with either backend.
+loads: Callable[[Union[bytes, str]], Any] = orjson.loads if orjson is not None else json.loads
+
+
+def dumps(obj: Any, indent: bool = False, newline: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, preferring orjson when it is installed.
+
+    ``indent`` gives two-space indentation and ``newline`` appends ``\\n`` (for
+    JSONL records). Non-string dict keys are converted to strings with either
+    backend; non-ASCII text is written as-is. Whitespace between tokens differs
+    between the backends, the parsed values do not.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, option=option)
+    s = json.dumps(obj, indent=2 if indent else None, ensure_ascii=False)
+    return (s + "\n" if newline else s).encode("utf-8")
@@ -1,8 +1,13 @@
+import atexit
 import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Tuple, Dict, Any, List
+import hashlib
+import json
 import os
 import glob
+import threading
 
 import numpy as np
 from mss import mss
@@ -101,17 +106,14 @@ class ImageAnalyzer:
         except Exception:
             return None
 
-    def capture_image(self, save_dir: Optional[Path] = None, bbox: Optional[Dict[str, int]] = None, tag: str = "screen") -> Dict[str, Any]:
-        """Capture a full ROI (configured) or a provided absolute bbox.
+    def capture_raw(self, bbox: Optional[Dict[str, int]] = None) -> Tuple[Optional[np.ndarray], Optional[str]]:
+        """Grab the configured ROI (or an absolute bbox) without analysing it.
 
-        Returns a dict with keys:
-        - ``ok`` (bool)
-        - ``text`` (str): OCR text when available, else empty string
-        - ``image_path`` (str | None)
-        - ``elements`` (list): detected UI element descriptors
+        Returns ``(pixels, error)``: a contiguous BGRA array on success, else
+        ``None`` and an error string.
         """
         if not getattr(self, "enabled", True):
-            return {"ok": False, "text": "", "error": "disabled", "image_path": None, "elements": []}
+            return None, "disabled"
         try:
             with mss() as sct:
                 if bbox is None:
@@ -123,29 +125,33 @@ class ImageAnalyzer:
                     bbox_use = {"left": int(bbox.get("left", 0)), "top": int(bbox.get("top", 0)), "width": max(1, int(bbox.get("width", 1))), "height": max(1, int(bbox.get("height", 1)))}
                 shot = sct.grab(bbox_use)
         except Exception as e:
-            return {"ok": False, "text": "", "error": f"capture failed: {e}", "image_path": None, "elements": []}
+            return None, f"capture failed: {e}"
+        return np.array(shot), None
 
-        arr = np.array(shot)[:, :, :3]
+    def capture_image(self, save_dir: Optional[Path] = None, bbox: Optional[Dict[str, int]] = None, tag: str = "screen") -> Dict[str, Any]:
+        """Capture a full ROI (configured) or a provided absolute bbox.
+
+        Returns a dict with keys:
+        - ``ok`` (bool)
+        - ``text`` (str): OCR text when available, else empty string
+        - ``image_path`` (str | None)
+        - ``image_size`` ([width, height]): pixel size of the capture (success only)
+        - ``elements`` (list): detected UI element descriptors
+        """
+        raw, err = self.capture_raw(bbox)
+        if raw is None:
+            return {"ok": False, "text": "", "error": err, "image_path": None, "elements": []}
+        return self.analyze_capture(raw, save_dir=save_dir, tag=tag)
+
+    def analyze_capture(self, raw: np.ndarray, save_dir: Optional[Path] = None, tag: str = "screen") -> Dict[str, Any]:
+        """Run the save/OCR/element-detection pass of ``capture_image`` on pixels from ``capture_raw``."""
+        arr = raw[:, :, :3]
         # mss returns BGRA on some platforms; keep raw RGB-like ordering
         img_path = None
         if self.save_debug:
             img_path = self._save_image(arr, save_dir, tag)
 
-        # Optional text OCR (best-effort).
-        text = ""
-        if pytesseract is not None and Image is not None:
-            try:
-                # Use the in-memory array to avoid re-reading from disk.
-                img = Image.fromarray(arr[:, :, ::-1])  # BGR -> RGB
-                psm = None
-                try:
-                    psm = int(self.cfg.get("tesseract_psm")) if self.cfg.get("tesseract_psm") is not None else None
-                except Exception:
-                    psm = None
-                config = f"--psm {psm}" if psm is not None else ""
-                text = pytesseract.image_to_string(img, config=config) or ""
-            except Exception:
-                text = ""
+        text = self.ocr_text(arr)
 
         elements: List[Dict[str, Any]] = []
         try:
@@ -154,7 +160,31 @@ class ImageAnalyzer:
         except Exception:
             elements = []
 
-        return {"ok": True, "text": text or "", "error": None, "image_path": img_path, "elements": elements}
+        return {
+            "ok": True,
+            "text": text or "",
+            "error": None,
+            "image_path": img_path,
+            "image_size": [int(arr.shape[1]), int(arr.shape[0])],
+            "elements": elements,
+        }
+
+    def ocr_text(self, arr: np.ndarray) -> str:
+        """Optional text OCR (best-effort) of a BGR array; empty when Tesseract is unavailable."""
+        if pytesseract is None or Image is None:
+            return ""
+        try:
+            # Use the in-memory array to avoid re-reading from disk.
+            img = Image.fromarray(arr[:, :, ::-1])  # BGR -> RGB
+            psm = None
+            try:
+                psm = int(self.cfg.get("tesseract_psm")) if self.cfg.get("tesseract_psm") is not None else None
+            except Exception:
+                psm = None
+            config = f"--psm {psm}" if psm is not None else ""
+            return pytesseract.image_to_string(img, config=config) or ""
+        except Exception:
+            return ""
 
     def capture_chat_text(self, save_dir: Optional[Path] = None) -> Dict[str, Any]:
         # Kept name for compatibility; now returns image and element detections instead of pure text
@@ -201,6 +231,15 @@ class ImageAnalyzer:
             img = cv2.imread(str(image_path))
             if img is None:
                 return []
+            return self.detect_ui_elements(img)
+        except Exception:
+            return []
+
+    def detect_ui_elements(self, img: np.ndarray) -> List[Dict[str, Any]]:
+        """OpenCV element detection on an in-memory BGR array (see ``detect_ui_elements_from_path``)."""
+        if cv2 is None:
+            return []
+        try:
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             # Blur and Canny to find edges
             blur = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -353,3 +392,245 @@ class ImageAnalyzer:
 
 # Backwards-compatible alias
 CopilotOCR = ImageAnalyzer
+
+
+def raw_digest(raw: np.ndarray) -> bytes:
+    """Cheap fingerprint of captured pixels (BLAKE2b over every 4th row and column)."""
+    return hashlib.blake2b(np.ascontiguousarray(raw[::4, ::4]), digest_size=16).digest()
+
+
+def frame_digest(ocr: ImageAnalyzer) -> Optional[bytes]:
+    """Cheap fingerprint of the current ROI (4x-strided BLAKE2b), or None if capture fails."""
+    raw, _ = ocr.capture_raw()
+    if raw is None:
+        return None
+    return raw_digest(raw)
+
+
+def wait_until_settled(ocr: ImageAnalyzer, max_ms: int, quantum_ms: int = 20, min_ms: int = 80) -> int:
+    """Wait until the OCR region stops redrawing, at most ``max_ms``.
+
+    Samples the ROI every ``quantum_ms`` and returns once two consecutive
+    samples hash identically after at least ``min_ms``, instead of always
+    sleeping the full settle time. If capture fails it degrades to a plain
+    sleep for the remaining time. Returns the elapsed milliseconds.
+    """
+    t0 = time.perf_counter()
+    max_s = max(0, int(max_ms)) / 1000.0
+    prev = None
+    while True:
+        elapsed = time.perf_counter() - t0
+        if elapsed >= max_s:
+            break
+        h = frame_digest(ocr)
+        if h is None:
+            time.sleep(max_s - elapsed)
+            break
+        if h == prev and elapsed * 1000.0 >= min_ms:
+            break
+        prev = h
+        time.sleep(min(quantum_ms / 1000.0, max(0.0, max_s - (time.perf_counter() - t0))))
+    return int((time.perf_counter() - t0) * 1000)
+
+
+class CachedOCR:
+    """Content-addressed result cache in front of an ``ImageAnalyzer``.
+
+    Each capture is hashed (BLAKE2b over the raw pixels) before analysis; a
+    pixel-identical frame - e.g. an idle chat pane - returns the previous
+    result instead of re-running OCR and element detection. Entries are kept in
+    an LRU of ``max_entries`` and, when ``cache_path`` is given, persisted as
+    JSON so later runs can reuse them: the file is rewritten every
+    ``save_every`` new entries, on ``flush()`` and at interpreter exit, outside
+    the analysis lock. Hits are returned with ``cached: True``.
+    Region/config changes go on the wrapped analyzer (``self.ocr``).
+
+    With ``tile_rows > 0`` (off by default) a frame miss falls back to
+    ``capture_chat_text_tiled``: element and template detection still run on
+    the whole ROI, but the OCR text pass is cut into horizontal bands and only
+    bands whose pixels changed are re-read, so a chat pane where just the
+    input box moved costs one band of OCR rather than the whole region.
+
+    ``analyze_capture`` takes pixels already grabbed with ``ocr.capture_raw`` so
+    callers can grab on one thread and analyse on another; analysis and cache
+    updates are serialized by an internal lock.
+    """
+
+    def __init__(self, ocr: ImageAnalyzer, cache_path: Optional[Path] = None, max_entries: int = 200, tile_rows: int = 0,
+                 save_every: int = 20):
+        self.ocr = ocr
+        self.cache_path = cache_path
+        self.max_entries = max(1, int(max_entries))
+        self.tile_rows = max(0, int(tile_rows))
+        self.save_every = max(1, int(save_every))
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._unsaved = 0
+        self._snap_gen = 0
+        self._written_gen = 0
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._load()
+        if cache_path is not None:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def frame_key(raw: np.ndarray, tag: str) -> str:
+        digest = hashlib.blake2b(np.ascontiguousarray(raw), digest_size=16).hexdigest()
+        return f"{tag}:{raw.shape[1]}x{raw.shape[0]}:{digest}"
+
+    def capture_image(self, save_dir: Optional[Path] = None, bbox: Optional[Dict[str, int]] = None, tag: str = "screen") -> Dict[str, Any]:
+        raw, err = self.ocr.capture_raw(bbox)
+        if raw is None:
+            return {"ok": False, "text": "", "error": err, "image_path": None, "elements": []}
+        return self.analyze_capture(raw, save_dir=save_dir, tag=tag, tiled=bbox is None)
+
+    def analyze_capture(self, raw: np.ndarray, save_dir: Optional[Path] = None, tag: str = "screen", tiled: bool = True) -> Dict[str, Any]:
+        """Cached counterpart of ``ImageAnalyzer.analyze_capture``."""
+        with self._lock:
+            res = self._analyze_locked(raw, save_dir, tag, tiled)
+            snapshot = self._snapshot() if self._unsaved >= self.save_every else None
+        if snapshot is not None:
+            self._write(snapshot)
+        return res
+
+    def flush(self) -> None:
+        """Write entries added since the last save to ``cache_path``."""
+        with self._lock:
+            snapshot = self._snapshot() if self._unsaved else None
+        if snapshot is not None:
+            self._write(snapshot)
+
+    def _analyze_locked(self, raw: np.ndarray, save_dir: Optional[Path], tag: str, tiled: bool) -> Dict[str, Any]:
+        key = self.frame_key(raw, tag)
+        hit = self._lru.get(key)
+        # A hit is only usable while the evidence image it points at still exists.
+        if hit is not None and (not hit.get("image_path") or Path(hit["image_path"]).exists()):
+            self._lru.move_to_end(key)
+            self.hits += 1
+            out = dict(hit, cached=True)
+            if out.get("image_path"):
+                out["image_path"] = Path(out["image_path"])
+            return out
+        self.misses += 1
+        if self.tile_rows and tiled and cv2 is not None:
+            res = self._analyze_tiled(raw, save_dir=save_dir, tag=tag, tile_rows=self.tile_rows)
+        else:
+            res = self.ocr.analyze_capture(raw, save_dir=save_dir, tag=tag)
+        if res.get("ok"):
+            entry = dict(res)
+            if entry.get("image_path") is not None:
+                entry["image_path"] = str(entry["image_path"])
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+            self._unsaved += 1
+        return res
+
+    def capture_chat_text(self, save_dir: Optional[Path] = None) -> Dict[str, Any]:
+        return self.capture_image(save_dir=save_dir, bbox=None, tag="copilot_chat")
+
+    def capture_chat_text_tiled(self, save_dir: Optional[Path] = None, tile_rows: int = 4) -> Dict[str, Any]:
+        """Like ``capture_chat_text`` but OCRs per band, reusing unchanged bands.
+
+        Elements are detected on the full ROI, so large elements (e.g. the
+        command palette) are reported whole; only the text is assembled from
+        bands. A text line straddling a band edge may be read in two pieces.
+        The result adds ``tiles`` and ``tiles_dirty`` counts. Without OpenCV
+        this is a plain full-frame capture.
+        """
+        raw, err = self.ocr.capture_raw(None)
+        if raw is None:
+            return {"ok": False, "text": "", "error": err, "image_path": None, "elements": []}
+        if cv2 is None:
+            return self.ocr.analyze_capture(raw, save_dir=save_dir, tag="copilot_chat")
+        with self._lock:
+            return self._analyze_tiled(raw, save_dir=save_dir, tag="copilot_chat", tile_rows=tile_rows)
+
+    def reset_tiles(self) -> None:
+        """Drop cached bands, e.g. after focus moves to a different view."""
+        with self._lock:
+            self._tiles.clear()
+
+    def _analyze_tiled(self, raw: np.ndarray, save_dir: Optional[Path], tag: str, tile_rows: int) -> Dict[str, Any]:
+        ocr = self.ocr
+        arr = raw[:, :, :3]
+        img_path = ocr._save_image(arr, save_dir, tag) if ocr.save_debug else None
+        h = int(arr.shape[0])
+        step = max(1, -(-h // max(1, int(tile_rows))))
+        texts: List[str] = []
+        n = dirty = 0
+        for y0 in range(0, h, step):
+            tile = np.ascontiguousarray(arr[y0:y0 + step])
+            key = self.frame_key(tile, "tile")
+            hit = self._tiles.get(key)
+            if hit is None:
+                hit = {"text": ocr.ocr_text(tile)}
+                self._tiles[key] = hit
+                dirty += 1
+            else:
+                self._tiles.move_to_end(key)
+            n += 1
+            if hit["text"]:
+                texts.append(hit["text"])
+        while len(self._tiles) > self.max_entries:
+            self._tiles.popitem(last=False)
+        # Element/template boxes must not be clipped at band edges (palette and
+        # input-box rules compare them against the full frame).
+        elements = ocr.detect_ui_elements(arr)
+        return {
+            "ok": True,
+            "text": "\n".join(texts),
+            "error": None,
+            "image_path": img_path,
+            "image_size": [int(arr.shape[1]), int(arr.shape[0])],
+            "elements": elements,
+            "tiles": n,
+            "tiles_dirty": dirty,
+        }
+
+    def capture_bbox_text(self, bbox: Dict[str, int], save_dir: Optional[Path] = None, tag: str = "bbox", preprocess_mode: str = "default") -> Dict[str, Any]:
+        return self.capture_image(save_dir=save_dir, bbox=bbox, tag=tag)
+
+    def _load(self) -> None:
+        if self.cache_path is None:
+            return
+        try:
+            data = json.loads(Path(self.cache_path).read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if isinstance(data, dict):
+            for k, v in list(data.items())[-self.max_entries:]:
+                if isinstance(v, dict):
+                    self._lru[str(k)] = v
+
+    def _snapshot(self) -> Optional[Tuple[int, Dict[str, Dict[str, Any]]]]:
+        # Called under self._lock. Entries are never mutated after insertion,
+        # so a shallow copy can be serialized after the lock is released.
+        self._unsaved = 0
+        if self.cache_path is None:
+            return None
+        self._snap_gen += 1
+        return self._snap_gen, dict(self._lru)
+
+    def _write(self, snapshot: Tuple[int, Dict[str, Dict[str, Any]]]) -> None:
+        gen, data = snapshot
+        p = Path(self.cache_path)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+        with self._io_lock:
+            # Two threads may race to write; never replace a newer snapshot.
+            if gen <= self._written_gen:
+                return
+            self._written_gen = gen
+            try:
+                p.parent.mkdir(parents=True, exist_ok=True)
+                tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp, p)
+            except Exception:
+                try:
+                    tmp.unlink()
+                except Exception:
+                    pass
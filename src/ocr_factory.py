@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+def _load_ocr_cfg(root: Path) -> dict:
+    cfg_path = root / "config" / "ocr.json"
+    cfg: dict = {}
+    if cfg_path.exists():
+        try:
+            cfg = json.loads(cfg_path.read_text(encoding="utf-8")) or {}
+        except Exception:
+            cfg = {}
+    return cfg
+
+
+@lru_cache(maxsize=4)
+def _cached_ocr(root: str, debug_dir: str) -> Any:
+    from src.ocr import CopilotOCR  # type: ignore
+
+    return CopilotOCR(_load_ocr_cfg(Path(root)), debug_dir=Path(debug_dir))
+
+
+def make_ocr(root: str, debug_dir: str, log_fn: Optional[Callable[[str], None]] = None) -> Any:
+    """Return a process-wide ``CopilotOCR`` for ``(root, debug_dir)``.
+
+    ``config/ocr.json`` is read once and the analyzer (including its template
+    cache) is reused by later calls in the same interpreter. ``log_fn`` is not
+    part of the cache key; when given it replaces the instance's logger so the
+    most recent caller receives messages.
+    """
+    ocr = _cached_ocr(str(root), str(debug_dir))
+    if log_fn is not None:
+        ocr.log = log_fn
+    return ocr
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    njit = None  # type: ignore
+
+
+# Column layout shared by every array in this module: left, top, width, height.
+X, Y, W, H = 0, 1, 2, 3
+
+
+def bboxes_to_array(elems: list) -> np.ndarray:
+    """(N, 4) float64 element bboxes as left, top, width, height (missing -> 0)."""
+    return np.array(
+        [
+            ((b.get("left") or 0), (b.get("top") or 0), (b.get("width") or 0), (b.get("height") or 0))
+            for b in ((e.get("bbox") or {}) for e in elems)
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 4)
+
+
+def element_bboxes(res: dict) -> np.ndarray:
+    """(N, 4) bbox array for an OCR result dict.
+
+    Uses the result's ``bbox_xywh`` array when the producer supplies one and
+    otherwise parses ``elements``. Results stay JSON-serializable, so the OCR
+    layer itself does not attach arrays.
+    """
+    bb = res.get("bbox_xywh")
+    if bb is not None:
+        return np.asarray(bb, dtype=np.float64).reshape(-1, 4)
+    return bboxes_to_array(res.get("elements") or [])
+
+
+def _classify_loop(bb, img_area, h_img, area_frac, top_frac, max_height, bottom_frac):
+    palette = False
+    ready = False
+    area_limit = area_frac * img_area
+    top_limit = top_frac * h_img
+    bottom_limit = bottom_frac * h_img
+    for i in range(bb.shape[0]):
+        top = bb[i, 1]
+        w = bb[i, 2]
+        h = bb[i, 3]
+        if w * h > area_limit and top < top_limit:
+            palette = True
+        if h < max_height and top > bottom_limit:
+            ready = True
+        if palette and ready:
+            break
+    return palette, ready
+
+
+# Compiled once per machine (cache=True writes to __pycache__); without numba
+# the vectorized NumPy predicates below are used instead.
+_classify_jit = njit(cache=True)(_classify_loop) if njit is not None else None
+
+
+def classify_bboxes(
+    bb: np.ndarray,
+    img_area: float,
+    h_img: float,
+    area_frac: float = 0.35,
+    top_frac: float = 0.4,
+    max_height: float = 80.0,
+    bottom_frac: float = 0.65,
+) -> Tuple[bool, bool]:
+    """Return ``(palette_geom, ready_geom)`` for an (N, 4) array from ``bboxes_to_array``.
+
+    ``palette_geom``: some element covers more than ``area_frac`` of the image
+    and starts above ``top_frac`` of its height (command palette / overlay).
+    ``ready_geom``: some element is shorter than ``max_height`` px and starts
+    below ``bottom_frac`` of the height (chat input box).
+    """
+    if _classify_jit is not None:
+        palette, ready = _classify_jit(bb, float(img_area), float(h_img), area_frac, top_frac, max_height, bottom_frac)
+        return bool(palette), bool(ready)
+    top, width, height = bb[:, Y], bb[:, W], bb[:, H]
+    palette = bool(((width * height > area_frac * img_area) & (top < top_frac * h_img)).any())
+    ready = bool(((height < max_height) & (top > bottom_frac * h_img)).any())
+    return palette, ready
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+# Every byte that is not an ASCII letter; deleting them leaves only the letters.
+_NON_ALPHA_BYTES = bytes(b for b in range(256) if not (65 <= b <= 90 or 97 <= b <= 122))
+
+
+def alpha_count(t: str) -> int:
+    """Number of characters in ``t`` for which ``str.isalpha()`` is true.
+
+    ASCII text (the usual OCR output) is counted in a single C-level
+    ``bytes.translate`` pass; other text falls back to a per-character count.
+    """
+    if t.isascii():
+        # For ASCII, str.isalpha() is exactly [A-Za-z].
+        return len(t.encode("ascii").translate(None, _NON_ALPHA_BYTES))
+    return sum(map(str.isalpha, t))
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import re
+from enum import IntFlag
+from functools import lru_cache
+
+
+class WindowKind(IntFlag):
+    NONE = 0
+    VSCODE = 1
+    COPILOT = 2
+    GITHUB = 4
+    EDGE = 8
+    MSEDGE = 16
+    CHROME = 32
+    BROWSER = EDGE | CHROME
+
+
+_KEYWORDS = {
+    "visual studio code": WindowKind.VSCODE,
+    "copilot": WindowKind.COPILOT,
+    "github": WindowKind.GITHUB,
+    "microsoft edge": WindowKind.MSEDGE | WindowKind.EDGE,
+    "edge": WindowKind.EDGE,
+    "chrome": WindowKind.CHROME,
+}
+# Zero-width lookahead so overlapping keywords ("microsoft edge" / "edge",
+# "github copilot") are all reported by a single finditer scan.
+_RE = re.compile("(?=(" + "|".join(re.escape(k) for k in _KEYWORDS) + "))")
+
+
+@lru_cache(maxsize=256)
+def classify_window(title: str) -> WindowKind:
+    """Classify a window title by the keywords it contains (case-insensitive).
+
+    Titles repeat tick after tick while a window stays in front, so results are
+    memoized per title string.
+    """
+    kind = WindowKind.NONE
+    for m in _RE.finditer(title.lower()):
+        kind |= _KEYWORDS[m.group(1)]
+    return kind
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import ctypes
 import os
+import threading
 import time
 from ctypes import wintypes
 from typing import Callable, List, Optional, Dict
@@ -10,6 +11,17 @@ user32 = ctypes.windll.user32
 kernel32 = ctypes.windll.kernel32
 
 EnumWindowsProc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+WinEventProc = ctypes.WINFUNCTYPE(
+    None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+)
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+QS_ALLINPUT = 0x04FF
+PM_NOREMOVE = 0x0000
+PM_REMOVE = 0x0001
+WM_QUIT = 0x0012
 
 
 def _get_window_text(hwnd: int) -> str:
@@ -71,6 +83,19 @@ def _get_process_path(pid: int) -> str:
         return ""
 
 
+def _set_win_event_hooks(proc, events) -> List[int]:
+    """Install one out-of-context hook per event; all or nothing (returns [] on failure)."""
+    user32.SetWinEventHook.restype = wintypes.HANDLE
+    user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+    hooks = [user32.SetWinEventHook(ev, ev, 0, proc, 0, 0, WINEVENT_OUTOFCONTEXT) for ev in events]
+    if not all(hooks):
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+        return []
+    return hooks
+
+
 def _enum_windows(callback: Callable[[int], None]) -> None:
     def _cb(hwnd, lparam):
         try:
@@ -203,6 +228,97 @@ class WindowsManager:
         except Exception:
             return None
 
+    def watch_foreground(self, callback: Callable[[int], None], duration_s: float) -> bool:
+        """Call ``callback(hwnd)`` on every foreground change for ``duration_s`` seconds.
+
+        Uses out-of-context ``SetWinEventHook`` hooks and pumps this thread's
+        message queue until the deadline, so nothing runs while the foreground
+        is unchanged. Title changes of the foreground window (e.g. a browser tab
+        switch, which keeps the hwnd) are reported too. Returns False if the
+        hooks could not be installed (callers should fall back to polling).
+        """
+
+        def _cb(hook, event, hwnd, id_object, id_child, thread_id, time_ms):
+            if not hwnd or id_object != 0:  # OBJID_WINDOW only
+                return
+            if event == EVENT_OBJECT_NAMECHANGE and int(hwnd) != int(user32.GetForegroundWindow() or 0):
+                return
+            try:
+                callback(int(hwnd))
+            except Exception:
+                pass
+
+        proc = WinEventProc(_cb)  # keep a reference for the hooks' lifetime
+        hooks = _set_win_event_hooks(proc, (EVENT_SYSTEM_FOREGROUND, EVENT_OBJECT_NAMECHANGE))
+        if not hooks:
+            return False
+        try:
+            msg = wintypes.MSG()
+            deadline = time.monotonic() + max(0.0, float(duration_s))
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                user32.MsgWaitForMultipleObjects(0, None, False, int(remaining * 1000) + 1, QS_ALLINPUT)
+                while user32.PeekMessageW(ctypes.byref(msg), 0, 0, 0, PM_REMOVE):
+                    user32.TranslateMessage(ctypes.byref(msg))
+                    user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            for hook in hooks:
+                user32.UnhookWinEvent(hook)
+        return True
+
+    def subscribe_foreground(self, callback: Callable[[int], None]) -> Optional[Callable[[], None]]:
+        """Call ``callback(hwnd)`` on every foreground change until unsubscribed.
+
+        The ``EVENT_SYSTEM_FOREGROUND`` hook lives on a daemon thread that blocks
+        in ``GetMessageW``, so callers can read a cached foreground hwnd instead
+        of polling ``GetForegroundWindow``. ``callback`` runs on that thread.
+        Returns an ``unsubscribe()`` function, or None if the hook could not be
+        installed (callers should fall back to ``get_foreground``).
+        """
+
+        def _cb(hook, event, hwnd, id_object, id_child, thread_id, time_ms):
+            if not hwnd or id_object != 0:  # OBJID_WINDOW only
+                return
+            try:
+                callback(int(hwnd))
+            except Exception:
+                pass
+
+        proc = WinEventProc(_cb)
+        ready = threading.Event()
+        state = {"tid": 0, "ok": False}
+
+        def _run() -> None:
+            msg = wintypes.MSG()
+            # Create this thread's message queue before anyone can post WM_QUIT to it.
+            user32.PeekMessageW(ctypes.byref(msg), 0, 0, 0, PM_NOREMOVE)
+            hooks = _set_win_event_hooks(proc, (EVENT_SYSTEM_FOREGROUND,))
+            state["tid"] = int(kernel32.GetCurrentThreadId())
+            state["ok"] = bool(hooks)
+            ready.set()
+            if not hooks:
+                return
+            try:
+                while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                    user32.TranslateMessage(ctypes.byref(msg))
+                    user32.DispatchMessageW(ctypes.byref(msg))
+            finally:
+                for hook in hooks:
+                    user32.UnhookWinEvent(hook)
+
+        t = threading.Thread(target=_run, name="foreground-hook", daemon=True)
+        t.start()
+        if not ready.wait(2.0) or not state["ok"]:
+            return None
+
+        def unsubscribe() -> None:
+            user32.PostThreadMessageW(state["tid"], WM_QUIT, 0, 0)
+            t.join(1.0)
+
+        return unsubscribe
+
     def get_window_info(self, hwnd: int) -> Dict[str, str]:
         try:
             title = _get_window_text(hwnd)
@@ -221,6 +337,14 @@ class WindowsManager:
         except Exception:
             return {"hwnd": str(hwnd or 0), "title": "", "class": "", "pid": "0", "process": "", "process_path": ""}
 
+    def get_window_title(self, hwnd: int) -> str:
+        # Title only: class/pid/process never change for a live hwnd, so callers
+        # polling the same window can reuse the rest of get_window_info().
+        try:
+            return _get_window_text(hwnd) or ""
+        except Exception:
+            return ""
+
     def get_window_process_name(self, hwnd: int) -> str:
         try:
             pid = _get_window_pid(hwnd)
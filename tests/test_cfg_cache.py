@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from src.cfg_cache import load_cfg
+
+
+def test_load_cfg_reuses_result_until_file_changes(tmp_path: Path) -> None:
+    p = tmp_path / "policy_rules.json"
+    p.write_text(json.dumps({"palette": {"banned": ["a"]}}), encoding="utf-8")
+
+    first = load_cfg(p)
+    assert first == {"palette": {"banned": ["a"]}}
+    assert load_cfg(p) is first
+
+    p.write_text(json.dumps({"palette": {"banned": ["a", "b"]}}), encoding="utf-8")
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert load_cfg(p) == {"palette": {"banned": ["a", "b"]}}
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from Scripts import html_to_image
+
+
+class _FailingChromium:
+    def launch(self):
+        raise RuntimeError("Executable doesn't exist; run 'playwright install'")
+
+
+class _FakePlaywright:
+    chromium = _FailingChromium()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_batch_falls_back_to_headless_when_launch_fails(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sync_api = types.ModuleType("playwright.sync_api")
+    sync_api.sync_playwright = _FakePlaywright  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "playwright", types.ModuleType("playwright"))
+    monkeypatch.setitem(sys.modules, "playwright.sync_api", sync_api)
+
+    headless_calls = []
+
+    def fake_headless(html, out_png, width, height, full_page, wait_ms, cancel=None):
+        headless_calls.append(html)
+        out_png.write_bytes(b"png")
+        return True
+
+    monkeypatch.setattr(html_to_image, "render_with_headless", fake_headless)
+    pairs = [(tmp_path / f"{n}.html", tmp_path / f"{n}.png") for n in ("a", "b")]
+
+    rendered = html_to_image.html_to_images(pairs, 800, 600, False, 0)
+
+    assert rendered == [out for _html, out in pairs]
+    assert headless_calls == [html for html, _out in pairs]
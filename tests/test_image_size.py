@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+
+from src.image_size import image_size
+
+
+def _png_header(w: int, h: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", w, h) + b"\x08\x02\x00\x00\x00"
+
+
+def test_image_size_reads_png_header(tmp_path: Path) -> None:
+    p = tmp_path / "capture.png"
+    p.write_bytes(_png_header(1920, 1080))
+    assert image_size(str(p)) == (1920, 1080)
+
+
+def test_image_size_missing_file_is_none(tmp_path: Path) -> None:
+    assert image_size(str(tmp_path / "missing.png")) is None
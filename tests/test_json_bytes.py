@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import json
+
+from src.json_bytes import dumps, loads
+
+
+def test_dumps_round_trips_with_either_backend() -> None:
+    obj = {"ts": "2024-01-01 00:00:00", "msg": "café", 3: [1, 2.5, None, True]}
+
+    line = dumps(obj, newline=True)
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert "café".encode("utf-8") in line
+    assert loads(line) == json.loads(json.dumps(obj))
+
+    pretty = dumps(obj, indent=True)
+    assert b'\n  "msg"' in pretty
+    assert loads(pretty) == loads(line)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("mss")
+
+from Scripts.measurement_smoke_test import template_ready  # noqa: E402
+
+
+def test_thin_template_is_found_by_default(tmp_path: Path) -> None:
+    # A 1 px checkerboard averages to flat grey when halved, so only the
+    # full-resolution match can see it.
+    tpl = ((np.indices((40, 40)).sum(axis=0) % 2) * 255).astype(np.uint8)
+    img = np.random.default_rng(0).integers(0, 256, size=(200, 300), dtype=np.uint8)
+    img[50:90, 100:140] = tpl
+    tpl_path = tmp_path / "tpl.png"
+    img_path = tmp_path / "capture.png"
+    cv2.imwrite(str(tpl_path), tpl)
+    cv2.imwrite(str(img_path), img)
+
+    assert template_ready(img_path, tpl_path, threshold=0.85)
+    assert template_ready(img_path, tpl_path, threshold=0.85, roi=(90, 40, 80, 80))
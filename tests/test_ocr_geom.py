@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.ocr_geom import _classify_loop, bboxes_to_array, classify_bboxes, element_bboxes  # noqa: E402
+
+
+def test_classify_bboxes_flags_overlay_and_input_box() -> None:
+    elems = [
+        {"bbox": {"width": 900, "height": 500, "top": 40}},
+        {"bbox": {"width": 600, "height": 30, "top": 700}},
+        {"bbox": {}},
+    ]
+    bb = bboxes_to_array(elems)
+    assert bb.shape == (3, 4)
+    assert (element_bboxes({"elements": elems}) == bb).all()
+    assert (element_bboxes({"elements": [], "bbox_xywh": bb}) == bb).all()
+    assert classify_bboxes(bb, 1000 * 1000, 1000) == (True, True)
+    assert classify_bboxes(bb[2:], 1000 * 1000, 1000) == (False, False)
+    assert classify_bboxes(bboxes_to_array([]), 1000 * 1000, 1000) == (False, False)
+
+
+def test_classify_loop_matches_vectorized_predicates() -> None:
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        bb = rng.uniform(0, 1000, size=(int(rng.integers(0, 8)), 4))
+        top, width, height = bb[:, 1], bb[:, 2], bb[:, 3]
+        expected = (
+            bool(((width * height > 0.35 * 1e6) & (top < 400)).any()),
+            bool(((height < 80) & (top > 650)).any()),
+        )
+        assert _classify_loop(bb, 1e6, 1000.0, 0.35, 0.4, 80.0, 0.65) == expected
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("mss")
+
+import src.ocr as ocr_mod  # noqa: E402
+from src.ocr import CachedOCR  # noqa: E402
+
+
+class _FakeAnalyzer:
+    """Reports one element covering the middle half of whatever image it is given."""
+
+    save_debug = False
+
+    def detect_ui_elements(self, img):
+        h, w = img.shape[:2]
+        return [{"type": "rect", "bbox": {"left": w // 4, "top": h // 4, "width": w // 2, "height": h // 2}, "score": 1.0}]
+
+    def ocr_text(self, img):
+        return ""
+
+
+def test_tiled_analysis_keeps_palette_sized_elements(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ocr_mod, "cv2", object())
+    cache = CachedOCR(_FakeAnalyzer(), tile_rows=4)
+    raw = np.zeros((400, 800, 4), dtype=np.uint8)
+
+    res = cache.analyze_capture(raw, tag="copilot_chat")
+
+    assert res["tiles"] == 4
+    (el,) = res["elements"]
+    b = el["bbox"]
+    assert b["width"] * b["height"] > 0.2 * 800 * 400
+
+
+class _TextAnalyzer:
+    save_debug = False
+
+    def analyze_capture(self, raw, save_dir=None, tag="screen"):
+        return {"ok": True, "text": str(int(raw[0, 0, 0])), "error": None, "image_path": None, "elements": []}
+
+
+def test_cache_file_is_written_in_batches_and_on_flush(tmp_path: Path) -> None:
+    path = tmp_path / "cache.json"
+    cache = CachedOCR(_TextAnalyzer(), cache_path=path, save_every=3)
+
+    for i in range(2):
+        cache.analyze_capture(np.full((4, 4, 4), i, dtype=np.uint8))
+    assert not path.exists()
+
+    cache.analyze_capture(np.full((4, 4, 4), 2, dtype=np.uint8))
+    assert len(json.loads(path.read_text(encoding="utf-8"))) == 3
+
+    cache.analyze_capture(np.full((4, 4, 4), 3, dtype=np.uint8))
+    cache.flush()
+    assert len(json.loads(path.read_text(encoding="utf-8"))) == 4
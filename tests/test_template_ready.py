@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+if sys.platform != "win32":
+    pytest.skip("the OCR gate scripts import the Windows UI helpers", allow_module_level=True)
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("mss")
+
+# The gate scripts import their sibling helpers (ocr_guard) as top-level modules.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+
+from Scripts import ocr_gate_chat_ready, ocr_observe_react_nav  # noqa: E402
+
+
+def _checkerboard_capture(tmp_path: Path) -> tuple[str, str]:
+    # A 1 px checkerboard blurs to flat grey when downsampled, so only a
+    # full-resolution match can locate it.
+    tpl = ((np.indices((40, 40)).sum(axis=0) % 2) * 255).astype(np.uint8)
+    img = np.random.default_rng(0).integers(0, 256, size=(200, 300), dtype=np.uint8)
+    img[50:90, 100:140] = tpl
+    tpl_path = tmp_path / "tpl.png"
+    img_path = tmp_path / "capture.png"
+    cv2.imwrite(str(tpl_path), tpl)
+    cv2.imwrite(str(img_path), img)
+    return str(img_path), str(tpl_path)
+
+
+def test_gate_finds_thin_template_by_default(tmp_path: Path) -> None:
+    img_path, tpl_path = _checkerboard_capture(tmp_path)
+    assert ocr_gate_chat_ready.template_ready(img_path, tpl_path, threshold=0.85)
+
+
+def test_nav_finds_thin_template_by_default_and_outside_the_chat_roi(tmp_path: Path) -> None:
+    img_path, tpl_path = _checkerboard_capture(tmp_path)
+    assert ocr_observe_react_nav.template_ready(img_path, tpl_path, threshold=0.85)
+    # The template sits above the chat ROI; a crop miss falls back to the whole frame.
+    assert ocr_observe_react_nav.template_ready(img_path, tpl_path, threshold=0.85, roi=ocr_observe_react_nav._CHAT_ROI)
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from src.text_stats import alpha_count
+
+
+def test_alpha_count_matches_isalpha() -> None:
+    for t in ["", "Ask Copilot: type your message", "123 !? _", "café über 中文 x1"]:
+        assert alpha_count(t) == sum(c.isalpha() for c in t)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from src.win_classify import WindowKind, classify_window
+
+
+def test_classify_window_reports_overlapping_keywords() -> None:
+    kind = classify_window("GitHub Copilot coding agent - Microsoft Edge")
+    assert kind & WindowKind.GITHUB
+    assert kind & WindowKind.COPILOT
+    assert kind & WindowKind.MSEDGE
+    assert kind & WindowKind.EDGE
+    assert not kind & WindowKind.VSCODE
+
+    assert classify_window("main.py - Visual Studio Code") == WindowKind.VSCODE
+    assert classify_window("Notepad") == WindowKind.NONE